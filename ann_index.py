@@ -0,0 +1,347 @@
+# 근사 최근접 이웃(HNSW) 인덱스 - 캠페인 집행 사례처럼 수십만 건 이상으로 커지는 코퍼스용
+# 백엔드: faiss (기본, faiss-cpu) / hnswlib (ANN_BACKEND 로 선택, 둘 다 선택 설치)
+# 인덱스 파일은 스냅샷 버전 디렉터리에 Chroma 와 나란히 저장:
+#   <컬렉션>.hnsw.faiss 또는 <컬렉션>.hnsw.hnswlib   HNSW 그래프 + 벡터
+#   <컬렉션>.hnsw.json                              라벨 → 문서 id 목록(삭제된 라벨은 null), 빌드 파라미터, 임베딩 설정
+# 문서 본문/메타데이터는 인덱스에 두지 않고 검색 결과 id 만 같은 버전의 Chroma 컬렉션에서 조회 (메모리/로드 시간 ∝ id 목록)
+# faiss 는 IO_FLAG_MMAP_IFC 로 읽어서 HNSW 벡터 저장소를 메모리 매핑
+#   (IO_FLAG_MMAP 은 IVF 역리스트만 매핑하므로 IFC 플래그가 없는 faiss 버전에서는 메모리로 읽음, hnswlib 도 메모리로 읽음)
+# 증분 동기화: 바뀐 문서는 새 라벨로 추가하고 이전 라벨/삭제 문서는 묘비(tombstone) 처리, 묘비 비율이 HNSW_REBUILD_RATIO 를 넘으면 전체 재빌드
+# 검색 인터페이스와 점수(거리, 작을수록 유사)는 media_index.NumpyMediaIndex 와 같음
+# M / ef_construction 은 빌드 시, ef_search 는 로드 후에도 set_ef() 로 조정 (클수록 recall ↑ 지연 ↑)
+import json
+import os
+
+import numpy as np
+from langchain_core.documents import Document
+
+from embedding import get_embedding_function
+from media_index import matches_filter
+
+ANN_BACKENDS = ("faiss", "hnswlib")
+DEFAULT_ANN_BACKEND = os.getenv("ANN_BACKEND", "faiss")
+HNSW_M = int(os.getenv("HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+# filter 에 맞는 문서가 이 수 이하면 그래프 대신 해당 문서만 정확 검색 (선택도가 높은 필터는 그래프 탐색이 k개를 못 채움)
+HNSW_EXACT_FILTER_MAX = int(os.getenv("HNSW_EXACT_FILTER_MAX", "2000"))
+# 묘비(삭제/갱신 전 라벨) 비율이 이 값을 넘으면 증분 반영 대신 전체 재빌드
+HNSW_REBUILD_RATIO = float(os.getenv("HNSW_REBUILD_RATIO", "0.2"))
+
+
+def _import_backend(backend):
+    if backend not in ANN_BACKENDS:
+        raise ValueError(f"지원하지 않는 ANN 백엔드: {backend} (사용 가능: {', '.join(ANN_BACKENDS)})")
+    try:
+        if backend == "faiss":
+            import faiss
+            return faiss
+        import hnswlib
+        return hnswlib
+    except ImportError as e:
+        package = "faiss-cpu" if backend == "faiss" else "hnswlib"
+        raise ImportError(f"hnsw 검색기를 사용하려면 {package} 패키지를 설치하세요.") from e
+
+
+def index_files(directory, name, backend):
+    # (인덱스 파일, id/설정 파일) 경로
+    return os.path.join(directory, f"{name}.hnsw.{backend}"), os.path.join(directory, f"{name}.hnsw.json")
+
+
+class ChromaDocumentSource:
+    # 검색 결과 id 의 문서와 filter 에 맞는 id 를 Chroma 컬렉션에서 조회
+    def __init__(self, vectorstore):
+        self.vectorstore = vectorstore
+
+    def get(self, ids) -> dict:
+        data = self.vectorstore._collection.get(ids=list(ids), include=["documents", "metadatas"])
+        return {
+            doc_id: Document(page_content=text or "", metadata=metadata or {})
+            for doc_id, text, metadata in zip(data["ids"], data["documents"], data["metadatas"])
+        }
+
+    def matching_ids(self, filter) -> list:
+        return self.vectorstore._collection.get(where=filter, include=[])["ids"]
+
+
+class InMemoryDocumentSource:
+    # 문서를 메모리에 들고 있는 소스 (벤치마크 등 Chroma 없이 쓸 때)
+    def __init__(self, ids, documents):
+        self.documents = dict(zip(ids, documents))
+
+    def get(self, ids) -> dict:
+        return {doc_id: self.documents[doc_id] for doc_id in ids if doc_id in self.documents}
+
+    def matching_ids(self, filter) -> list:
+        return [doc_id for doc_id, document in self.documents.items() if matches_filter(document.metadata, filter)]
+
+
+class HnswIndex:
+    def __init__(self, index, ids, source, backend, normalized, embedding_function=None, ef_search=HNSW_EF_SEARCH,
+                 params=None):
+        # ids: 라벨(인덱스 안 위치) → 문서 id, 삭제된 라벨은 None
+        self.index = index
+        self.ids = list(ids)
+        self.labels = {doc_id: label for label, doc_id in enumerate(self.ids) if doc_id is not None}
+        self.source = source
+        self.backend = backend
+        self.normalized = normalized
+        self.embedding_function = embedding_function or get_embedding_function()
+        self.params = params or {}
+        self.set_ef(ef_search)
+
+    @classmethod
+    def build(cls, embeddings, ids, source, embedding_function=None, backend=DEFAULT_ANN_BACKEND, m=HNSW_M,
+              ef_construction=HNSW_EF_CONSTRUCTION, ef_search=HNSW_EF_SEARCH, normalized=None):
+        # 정규화 임베딩은 내적, 아니면 L2 거리로 그래프 구성
+        module = _import_backend(backend)
+        embedding_function = embedding_function or get_embedding_function()
+        if normalized is None:
+            normalized = getattr(embedding_function, "normalize", False)
+        ids = list(ids)
+        vectors = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1))
+        dim = vectors.shape[1]
+
+        if backend == "faiss":
+            metric = module.METRIC_INNER_PRODUCT if normalized else module.METRIC_L2
+            index = module.IndexHNSWFlat(dim, m, metric)
+            index.hnsw.efConstruction = ef_construction
+            if len(vectors):
+                index.add(vectors)
+        else:
+            index = module.Index(space="ip" if normalized else "l2", dim=dim)
+            index.init_index(max_elements=max(len(vectors), 1), M=m, ef_construction=ef_construction)
+            if len(vectors):
+                index.add_items(vectors, np.arange(len(vectors)))
+
+        return cls(index, ids, source, backend, normalized, embedding_function, ef_search,
+                   {"m": m, "ef_construction": ef_construction, "dim": dim})
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore, embedding_function=None, **kwargs):
+        # 이미 만들어진 Chroma 컬렉션의 임베딩으로 그래프만 새로 구성 (임베딩 재계산 없음)
+        data = vectorstore._collection.get(include=["embeddings"])
+        embeddings = data["embeddings"] if len(data["embeddings"]) else np.zeros((0, 0), dtype=np.float32)
+        return cls.build(embeddings, data["ids"], ChromaDocumentSource(vectorstore),
+                         embedding_function or vectorstore.embeddings, **kwargs)
+
+    def save(self, directory, name):
+        # 임시 파일에 쓰고 os.replace (id 파일을 마지막에 바꾸므로 id 파일이 있으면 인덱스 파일도 완성된 상태)
+        index_path, meta_path = index_files(directory, name, self.backend)
+        tmp_index_path = f"{index_path}.tmp.{os.getpid()}"
+        if self.backend == "faiss":
+            _import_backend("faiss").write_index(self.index, tmp_index_path)
+        else:
+            self.index.save_index(tmp_index_path)
+        os.replace(tmp_index_path, index_path)
+
+        tmp_meta_path = f"{meta_path}.tmp.{os.getpid()}"
+        with open(tmp_meta_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "backend": self.backend,
+                "normalized": self.normalized,
+                **self.params,
+                **self.embedding_function.index_metadata(),
+                "ids": self.ids,
+            }, f, ensure_ascii=False)
+        os.replace(tmp_meta_path, meta_path)
+
+    @classmethod
+    def load(cls, directory, name, source, embedding_function=None, backend=DEFAULT_ANN_BACKEND,
+             ef_search=HNSW_EF_SEARCH, writable=False):
+        # 저장된 인덱스가 없으면 FileNotFoundError, writable=True 면 메모리로 읽어서 upsert/delete 가능
+        module = _import_backend(backend)
+        index_path, meta_path = index_files(directory, name, backend)
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if "ids" not in meta:
+            raise FileNotFoundError(f"{meta_path} 는 id 목록이 없는 예전 형식입니다.")
+        embedding_function = embedding_function or get_embedding_function()
+        embedding_function.check_index_metadata(meta, index_path)
+
+        if backend == "faiss":
+            flags = 0
+            if not writable and hasattr(module, "IO_FLAG_MMAP_IFC"):
+                flags = module.IO_FLAG_MMAP_IFC | module.IO_FLAG_READ_ONLY
+            index = module.read_index(index_path, flags)
+        else:
+            index = module.Index(space="ip" if meta["normalized"] else "l2", dim=meta["dim"])
+            index.load_index(index_path, max_elements=max(len(meta["ids"]), 1))
+
+        params = {key: meta[key] for key in ("m", "ef_construction", "dim") if key in meta}
+        return cls(index, meta["ids"], source, backend, meta["normalized"], embedding_function, ef_search, params)
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def deleted_count(self):
+        return len(self.ids) - len(self.labels)
+
+    def set_ef(self, ef_search):
+        self.ef_search = ef_search
+        if self.backend == "faiss":
+            self.index.hnsw.efSearch = ef_search
+        else:
+            self.index.set_ef(ef_search)
+
+    def delete(self, ids):
+        # 라벨을 묘비 처리 (그래프에서는 빼지 않고 검색 결과에서만 제외)
+        for doc_id in ids:
+            label = self.labels.pop(doc_id, None)
+            if label is None:
+                continue
+            self.ids[label] = None
+            if self.backend == "hnswlib":
+                self.index.mark_deleted(label)
+
+    def upsert(self, ids, embeddings):
+        # 이미 있는 문서는 이전 라벨을 묘비 처리하고 새 라벨로 추가
+        ids = list(ids)
+        if not ids:
+            return
+        self.delete(ids)
+        vectors = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1))
+        start = len(self.ids)
+        if self.backend == "faiss":
+            self.index.add(vectors)
+        else:
+            self.index.resize_index(start + len(ids))
+            self.index.add_items(vectors, np.arange(start, start + len(ids)))
+        for offset, doc_id in enumerate(ids):
+            self.ids.append(doc_id)
+            self.labels[doc_id] = start + offset
+
+    def _to_distances(self, raw):
+        # faiss 내적 인덱스는 내적(클수록 유사)을 돌려주므로 1 - 내적으로 변환, L2 는 제곱 거리 그대로
+        # hnswlib ip 공간은 이미 1 - 내적
+        if self.backend == "faiss" and self.normalized:
+            return 1.0 - raw
+        return raw
+
+    def _vectors(self, labels):
+        if self.backend == "faiss":
+            return self.index.reconstruct_batch(labels)
+        return np.asarray(self.index.get_items(labels), dtype=np.float32)
+
+    def _exact_search(self, queries, k, labels):
+        # labels 에 해당하는 벡터만 꺼내서 정확 검색, (거리, 라벨) 행렬 반환
+        vectors = self._vectors(labels)
+        scores = queries @ vectors.T
+        if self.normalized:
+            distances = 1.0 - scores
+        else:
+            distances = (np.einsum("ij,ij->i", vectors, vectors)[None, :] - 2.0 * scores
+                         + np.einsum("ij,ij->i", queries, queries)[:, None])
+        order = np.argsort(distances, axis=1)[:, :k]
+        return np.take_along_axis(distances, order, axis=1), labels[order]
+
+    def _graph_search(self, queries, k, allowed):
+        # 필터 선택도(허용 문서 비율)에 반비례해서 ef 를 올려 탐색, 부족한 자리는 라벨 -1
+        ef = max(self.ef_search, k)
+        if allowed is not None:
+            ef = min(int(ef * len(self.labels) / max(len(allowed), 1)), len(self.labels))
+
+        if self.backend == "faiss":
+            faiss = _import_backend("faiss")
+            # selector 가 참조하는 배열은 검색이 끝날 때까지 살아 있어야 함
+            if allowed is not None:
+                selector = faiss.IDSelectorBatch(allowed)
+            elif self.deleted_count:
+                live = np.fromiter((doc_id is not None for doc_id in self.ids), dtype=bool, count=len(self.ids))
+                bitmap = np.packbits(live, bitorder="little")
+                selector = faiss.IDSelectorBitmap(bitmap)
+            else:
+                selector = None
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=ef)
+            raw, labels = self.index.search(queries, k, params=params)
+            return self._to_distances(raw), labels
+
+        # hnswlib 은 호출별 ef 를 받지 않으므로 ef 개를 요청해서 탐색 폭을 넓히고 앞의 k개만 사용
+        allowed_set = set(allowed.tolist()) if allowed is not None else None
+        try:
+            labels, distances = self.index.knn_query(
+                queries, k=min(ef, len(allowed) if allowed is not None else len(self.labels)),
+                filter=None if allowed_set is None else allowed_set.__contains__
+            )
+        except RuntimeError:
+            # 그래프 탐색으로 요청한 개수를 못 채움
+            return np.full((len(queries), k), np.inf), np.full((len(queries), k), -1, dtype=np.int64)
+        return distances[:, :k], labels[:, :k].astype(np.int64)
+
+    def _search(self, queries, k, allowed):
+        # allowed: 허용 라벨 배열 (None 이면 삭제되지 않은 전체), (거리, 라벨) 행렬 반환
+        if allowed is not None and len(allowed) <= max(HNSW_EXACT_FILTER_MAX, k):
+            return self._exact_search(queries, k, allowed)
+
+        distances, labels = self._graph_search(queries, k, allowed)
+        short = np.flatnonzero((labels < 0).any(axis=1))
+        if len(short):
+            # 그래프 탐색이 k개를 못 채운 쿼리만 정확 검색으로 다시
+            candidates = allowed if allowed is not None else np.array(sorted(self.labels.values()), dtype=np.int64)
+            distances[short], labels[short] = self._exact_search(queries[short], k, candidates)
+        return distances, labels
+
+    def _allowed_labels(self, filter):
+        labels = [self.labels[doc_id] for doc_id in self.source.matching_ids(filter) if doc_id in self.labels]
+        return np.array(sorted(labels), dtype=np.int64)
+
+    def batch_similarity_search_by_vector_with_score(self, embeddings, k=4, filter=None):
+        queries = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32))
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        allowed = self._allowed_labels(filter) if filter else None
+        k = min(k, len(self.labels) if allowed is None else len(allowed))
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        distances, labels = self._search(queries, k, allowed)
+        documents = self.source.get({self.ids[label] for label in labels.ravel().tolist()})
+        return [
+            [(documents[self.ids[label]], float(distance)) for label, distance in zip(row_labels.tolist(), row_distances)]
+            for row_labels, row_distances in zip(labels, distances)
+        ]
+
+    def batch_similarity_search_with_score(self, queries, k=4, filter=None):
+        embeddings = self.embedding_function.embed_documents(list(queries))
+        return self.batch_similarity_search_by_vector_with_score(embeddings, k, filter)
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4, filter=None):
+        return self.batch_similarity_search_by_vector_with_score([embedding], k, filter)[0]
+
+    def similarity_search_with_score(self, query, k=4, filter=None):
+        return self.similarity_search_by_vector_with_score(self.embedding_function.embed_query(query), k, filter)
+
+    def similarity_search(self, query, k=4, filter=None):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+
+def load_hnsw_index(vectorstore, directory, name, backend=DEFAULT_ANN_BACKEND) -> HnswIndex:
+    return HnswIndex.load(directory, name, ChromaDocumentSource(vectorstore), vectorstore.embeddings, backend)
+
+
+def save_hnsw_index(vectorstore, directory, name, backend=DEFAULT_ANN_BACKEND) -> HnswIndex:
+    # Chroma 컬렉션 전체 임베딩으로 그래프를 새로 만들어 버전 디렉터리에 저장
+    ann = HnswIndex.from_vectorstore(vectorstore, backend=backend)
+    ann.save(directory, name)
+    return ann
+
+
+def update_hnsw_index(vectorstore, directory, name, upsert_ids=(), delete_ids=(), backend=DEFAULT_ANN_BACKEND) -> HnswIndex:
+    # 이전 버전에서 복사된 인덱스에 바뀐 문서 벡터만 추가/묘비 처리해서 다시 저장 (동기화 비용 ∝ 변경 수)
+    # 복사된 인덱스가 없거나 묘비 비율이 HNSW_REBUILD_RATIO 를 넘으면 전체 재빌드
+    try:
+        ann = HnswIndex.load(directory, name, ChromaDocumentSource(vectorstore), vectorstore.embeddings, backend,
+                             writable=True)
+    except FileNotFoundError:
+        return save_hnsw_index(vectorstore, directory, name, backend)
+
+    ann.delete(delete_ids)
+    upsert_ids = list(upsert_ids)
+    if upsert_ids:
+        data = vectorstore._collection.get(ids=upsert_ids, include=["embeddings"])
+        ann.upsert(data["ids"], data["embeddings"])
+    if ann.deleted_count > HNSW_REBUILD_RATIO * max(len(ann.ids), 1):
+        return save_hnsw_index(vectorstore, directory, name, backend)
+    ann.save(directory, name)
+    return ann
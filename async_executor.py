@@ -0,0 +1,32 @@
+# FastAPI 이벤트 루프 밖에서 블로킹 작업 실행
+# - 검색 풀: 임베딩(torch) / 벡터 검색처럼 CPU 를 쓰는 짧은 작업 (SEARCH_MAX_WORKERS 개로 제한)
+# - 블로킹 풀: 동기 에이전트 실행(Whisper 전사, 동기 LLM/웹 검색 호출)처럼 오래 걸리는 작업 (BLOCKING_MAX_WORKERS 개로 제한)
+# 풀을 나눠서 오래 걸리는 에이전트 작업이 몰려도 매칭 검색이 밀리지 않게 함
+# 프로세스 풀은 워커마다 임베딩 모델/인덱스를 다시 올려야 해서 쓰지 않음 (torch, numpy, faiss 연산은 GIL 을 놓음)
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+SEARCH_MAX_WORKERS = int(os.getenv("SEARCH_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+BLOCKING_MAX_WORKERS = int(os.getenv("BLOCKING_MAX_WORKERS", "4"))
+
+_search_executor = ThreadPoolExecutor(max_workers=SEARCH_MAX_WORKERS, thread_name_prefix="search")
+_blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_MAX_WORKERS, thread_name_prefix="blocking")
+
+
+async def run_search(func, *args, **kwargs):
+    # 임베딩/벡터 검색 함수를 검색 풀에서 실행하고 결과를 기다림
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_search_executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_blocking(func, *args, **kwargs):
+    # 동기 에이전트 함수를 블로킹 풀에서 실행하고 결과를 기다림
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_executor, functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executors(wait=True):
+    _search_executor.shutdown(wait=wait)
+    _blocking_executor.shutdown(wait=wait)
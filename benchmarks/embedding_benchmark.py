@@ -0,0 +1,84 @@
+# 임베딩 백엔드(torch / torch-int8 / onnx) 정합성 검사 및 지연시간 비교
+# 실행: python -m benchmarks.embedding_benchmark [--backends torch torch-int8 onnx] [--threshold 0.98]
+# 샘플 media.csv 문서를 각 백엔드로 임베딩해서 torch(fp32) 결과와의 코사인 유사도가 threshold 미만이면 종료 코드 1
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from embedding import DEFAULT_MODEL_NAME, BACKENDS, BERTSentenceEmbedding, load_model
+
+SAMPLE_MEDIA_CSV = "data/data_sample/media.csv"
+
+
+def media_texts():
+    # create_vectorstore.py 의 문서 본문과 같은 형식
+    df = pd.read_csv(SAMPLE_MEDIA_CSV)
+    return [
+        f"위치: {row.location}\n타겟: {row.population_target}\n매체 특징: {row.media_characteristics}\n집행 사례: {row.case_examples}"
+        for row in df.itertuples()
+    ]
+
+
+def cosine(a, b):
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    return (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+
+def measure(embedding, texts, repeat):
+    embedding.embed_documents(texts[:4])  # 워밍업
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        vectors = embedding.embed_documents(texts)
+    batch_ms = (time.perf_counter() - start) / repeat * 1000
+
+    query_times = []
+    for text in texts:
+        start = time.perf_counter()
+        embedding.embed_query(text)
+        query_times.append((time.perf_counter() - start) * 1000)
+
+    return vectors, batch_ms, float(np.percentile(query_times, 50)), float(np.percentile(query_times, 95))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    parser.add_argument("--threshold", type=float, default=0.98, help="torch(fp32) 대비 최소 코사인 유사도")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--parity-tolerance", type=float, default=1e-5, help="다른 백엔드 생성 전후 torch 결과 최대 차이")
+    args = parser.parse_args()
+
+    texts = media_texts()
+    torch_embedding = BERTSentenceEmbedding(args.model, backend="torch")
+    reference, *_ = measure(torch_embedding, texts, 1)
+
+    failed = False
+    print(f"{len(texts)} docs, model={args.model}")
+    print(f"{'backend':<12}{'batch(ms)':>12}{'query p50':>12}{'query p95':>12}{'cos min':>10}{'cos mean':>10}")
+    for backend in args.backends:
+        vectors, batch_ms, p50, p95 = measure(BERTSentenceEmbedding(args.model, backend=backend), texts, args.repeat)
+        similarity = cosine(reference, vectors)
+        ok = similarity.min() >= args.threshold
+        failed |= not ok
+        print(f"{backend:<12}{batch_ms:>12.1f}{p50:>12.2f}{p95:>12.2f}{similarity.min():>10.4f}{similarity.mean():>10.4f}"
+              f"{'' if ok else '  FAIL'}")
+
+    # 다른 백엔드를 만든 뒤에도 공유 fp32 모델이 그대로인지 (eval 모드 유지, torch 결과 불변)
+    after = np.asarray(torch_embedding.embed_documents(texts), dtype=np.float32)
+    drift = float(np.abs(after - np.asarray(reference, dtype=np.float32)).max())
+    shared_ok = drift <= args.parity_tolerance and not load_model(args.model)[1].training
+    failed |= not shared_ok
+    print(f"torch parity after building {', '.join(args.backends)}: max abs diff {drift:.2e}"
+          f"{'' if shared_ok else '  FAIL (공유 모델 상태가 바뀜)'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
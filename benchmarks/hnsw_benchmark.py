@@ -0,0 +1,134 @@
+# HNSW 근사 검색(ann_index.HnswIndex) vs 정확 검색(media_index.NumpyMediaIndex) recall@k / 지연시간 비교
+# 실행: python -m benchmarks.hnsw_benchmark [--docs 200000] [--backend faiss] [--m 32] [--ef 16 32 64 128 256] [--min-recall 0.9]
+# 합성 코퍼스: 단위 구면 위의 군집(캠페인 유형별로 모이는 실제 임베딩 분포 흉내), 쿼리는 같은 분포에서 따로 뽑음
+# 필터 검색(문서의 --filter-fractions 비율만 허용)도 기본 ef 에서 정확 검색과 비교
+# HNSW_EF_SEARCH(기본 ef) 에서 recall@k 가 min-recall 미만이거나 필터 검색이 k개를 못 채우면 종료 코드 1
+import argparse
+import sys
+import tempfile
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+
+from ann_index import DEFAULT_ANN_BACKEND, HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH, HNSW_M, HnswIndex, InMemoryDocumentSource
+from media_index import NumpyMediaIndex, matches_filter
+
+
+class PrecomputedEmbedding:
+    # 벤치마크는 벡터로 직접 검색하므로 모델을 로드하지 않음
+    normalize = True
+    model_name = "synthetic"
+    pooling_tag = "synthetic"
+
+    def index_metadata(self):
+        return {"embedding_model": self.model_name, "pooling": self.pooling_tag, "hnsw:space": "ip"}
+
+    def check_index_metadata(self, metadata, index_name=""):
+        pass
+
+
+def synthetic_corpus(docs, queries, dim, clusters, spread, seed):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+
+    def sample(n):
+        vectors = centers[rng.integers(0, clusters, n)] + spread * rng.standard_normal((n, dim)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    return sample(docs), sample(queries)
+
+
+def measure(index, queries, k, filter=None):
+    # 쿼리 하나씩 검색 (API 요청 하나 = 쿼리 하나), (결과 id 목록, 평균 ms, p95 ms)
+    results, times = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = index.similarity_search_by_vector_with_score(query, k, filter=filter)
+        times.append((time.perf_counter() - start) * 1000)
+        results.append([doc.metadata["id"] for doc, _ in hits])
+    return results, float(np.mean(times)), float(np.percentile(times, 95))
+
+
+def recall(results, truth, k):
+    return float(np.mean([len(set(found[:k]) & set(expected[:k])) / k for found, expected in zip(results, truth)]))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument("--spread", type=float, default=0.6, help="군집 안 분산 (클수록 군집 구분이 흐려짐)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--backend", default=DEFAULT_ANN_BACKEND)
+    parser.add_argument("--m", type=int, default=HNSW_M)
+    parser.add_argument("--ef-construction", type=int, default=HNSW_EF_CONSTRUCTION)
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    parser.add_argument("--min-recall", type=float, default=0.9, help=f"ef={HNSW_EF_SEARCH} 에서의 최소 recall@k")
+    parser.add_argument("--filter-fractions", type=float, nargs="*", default=[0.001, 0.05, 0.3],
+                        help="필터 검색에서 허용할 문서 비율")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    embedding = PrecomputedEmbedding()
+    vectors, queries = synthetic_corpus(args.docs, args.queries, args.dim, args.clusters, args.spread, args.seed)
+    # bucket 은 0~9999 균등 분포 (필터 비율 f 는 bucket < f * 10000)
+    buckets = np.random.default_rng(args.seed + 1).integers(0, 10_000, args.docs)
+    ids = [str(i) for i in range(args.docs)]
+    documents = [Document(page_content="", metadata={"id": i, "bucket": int(bucket)}) for i, bucket in enumerate(buckets)]
+
+    exact = NumpyMediaIndex(documents, vectors, embedding)
+    truth, exact_ms, exact_p95 = measure(exact, queries, args.k)
+
+    start = time.perf_counter()
+    source = InMemoryDocumentSource(ids, documents)
+    built = HnswIndex.build(vectors, ids, source, embedding, backend=args.backend, m=args.m,
+                            ef_construction=args.ef_construction)
+    build_s = time.perf_counter() - start
+
+    # 실제 서비스처럼 저장했다가 다시 읽은 인덱스로 측정 (faiss 는 mmap 로드)
+    with tempfile.TemporaryDirectory() as directory:
+        built.save(directory, "bench")
+        del built
+        start = time.perf_counter()
+        ann = HnswIndex.load(directory, "bench", source, embedding, backend=args.backend)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{args.docs} docs, dim={args.dim}, k={args.k}, backend={args.backend}, M={args.m}, "
+              f"ef_construction={args.ef_construction}, build={build_s:.1f}s, load={load_ms:.0f}ms")
+        print(f"{'search':<12}{'recall@k':>10}{'mean(ms)':>10}{'p95(ms)':>10}{'speedup':>10}")
+        print(f"{'exact':<12}{1.0:>10.4f}{exact_ms:>10.3f}{exact_p95:>10.3f}{1.0:>10.1f}")
+
+        failed = False
+        for ef in sorted(set(args.ef) | {HNSW_EF_SEARCH}):
+            ann.set_ef(ef)
+            results, mean_ms, p95_ms = measure(ann, queries, args.k)
+            score = recall(results, truth, args.k)
+            ok = ef != HNSW_EF_SEARCH or score >= args.min_recall
+            failed |= not ok
+            marker = "*" if ef == HNSW_EF_SEARCH else ""
+            print(f"{f'ef={ef}{marker}':<12}{score:>10.4f}{mean_ms:>10.3f}{p95_ms:>10.3f}{exact_ms / mean_ms:>10.1f}"
+                  f"{'' if ok else '  FAIL'}")
+
+        # 필터 검색: 허용 문서가 적으면 정확 검색, 많으면 선택도만큼 ef 를 올린 그래프 탐색
+        ann.set_ef(HNSW_EF_SEARCH)
+        for fraction in args.filter_fractions:
+            # range 는 in 검사가 O(1) 이라 필터 평가 비용이 측정을 덮지 않음
+            filter = {"bucket": {"$in": range(int(fraction * 10_000))}}
+            allowed = int(sum(1 for document in documents if matches_filter(document.metadata, filter)))
+            expected, exact_f_ms, _ = measure(exact, queries, args.k, filter)
+            results, mean_ms, p95_ms = measure(ann, queries, args.k, filter)
+            score = recall(results, expected, min(args.k, allowed)) if allowed else 1.0
+            ok = all(len(found) == min(args.k, allowed) for found in results) and score >= args.min_recall
+            failed |= not ok
+            print(f"{f'filter {fraction:g}':<12}{score:>10.4f}{mean_ms:>10.3f}{p95_ms:>10.3f}{exact_f_ms / mean_ms:>10.1f}"
+                  f"  ({allowed} docs){'' if ok else '  FAIL'}")
+        del ann
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
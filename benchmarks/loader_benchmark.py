@@ -0,0 +1,82 @@
+# pandas 로더 vs LOAD DATA LOCAL INFILE 고속 경로 비교 벤치마크
+# 실행: python -m benchmarks.loader_benchmark --db-url "mysql+aiomysql://user:pw@host:3306/bench_db" --rows 100000
+# 주의: 벤치마크용 DB를 사용할 것 (합성 sales_logs 행을 넣었다가 삭제함)
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.db_model import Base
+from loaders.brand_loader import load_brand
+from loaders.sales_log_loader import load_sales_log
+from loaders.fast_loader import fast_load_table
+
+SAMPLE_BRAND_CSV = "data/data_sample/brand.csv"
+SAMPLE_SALES_LOG_CSV = "data/data_sample/sales_log.csv"
+ID_OFFSET = 10_000_000
+
+
+def make_synthetic_sales_log(rows: int, out_path: str):
+    # 샘플 sales_log를 반복해서 rows개 행을 만들고 sales_log_id는 겹치지 않게 재부여
+    sample = pd.read_csv(SAMPLE_SALES_LOG_CSV, na_filter=False)
+    repeats = rows // len(sample) + 1
+    df = pd.concat([sample] * repeats, ignore_index=True).iloc[:rows]
+    df["sales_log_id"] = range(ID_OFFSET, ID_OFFSET + rows)
+    df.to_csv(out_path, index=False)
+
+
+async def cleanup(session_factory, csv_path: str):
+    async with session_factory() as session:
+        await session.execute(text("DELETE FROM sales_logs WHERE sales_log_id >= :offset"), {"offset": ID_OFFSET})
+        await session.execute(text("DELETE FROM load_manifest_rows WHERE file_path = :path"), {"path": csv_path})
+        await session.commit()
+
+
+async def main(db_url: str, rows: int):
+    engine = create_async_engine(db_url, connect_args={"local_infile": True})
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with session_factory() as session:
+        await load_brand(SAMPLE_BRAND_CSV, session)  # sales_logs.brand_id FK
+
+    fd, csv_path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        make_synthetic_sales_log(rows, csv_path)
+        await cleanup(session_factory, csv_path)
+
+        start = time.perf_counter()
+        async with session_factory() as session:
+            await load_sales_log(csv_path, session, chunksize=5000)
+        pandas_sec = time.perf_counter() - start
+        await cleanup(session_factory, csv_path)
+
+        start = time.perf_counter()
+        async with session_factory() as session:
+            await fast_load_table("sales_logs", csv_path, session)
+        fast_sec = time.perf_counter() - start
+        await cleanup(session_factory, csv_path)
+    finally:
+        os.remove(csv_path)
+        await engine.dispose()
+
+    print(f"rows: {rows}")
+    print(f"pandas loader : {pandas_sec:8.2f}s ({rows / pandas_sec:,.0f} rows/s)")
+    print(f"LOAD DATA     : {fast_sec:8.2f}s ({rows / fast_sec:,.0f} rows/s)")
+    print(f"speedup       : {pandas_sec / fast_sec:8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db-url", required=True, help="벤치마크용 DB URL (mysql+aiomysql://...)")
+    parser.add_argument("--rows", type=int, default=100000, help="합성 sales_log 행 수")
+    args = parser.parse_args()
+    asyncio.run(main(args.db_url, args.rows))
@@ -10,14 +10,13 @@ import os
 from dotenv import load_dotenv
 import re
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, func
+from sqlalchemy import Column, Integer, String, Text
 from models.db_model import SalesLog
 
 from sqlalchemy.future import select
 from sqlalchemy.exc import SQLAlchemyError
-from models.db_model import Brand
+from cruds.brand import get_or_create_brand_id
 from datetime import datetime
-import uuid
 
 # 1️⃣ FastAPI 앱 및 DB 세팅
 load_dotenv()
@@ -153,42 +152,15 @@ def extract_fields(summary: str, full_text: str):
 # brand 있으면 조회해서 아이디 가져오고 없으면 brand 새로 생성
 async def get_or_create_brand(session: AsyncSession, brand_data: dict) -> int | None:
     try:
-        # 브랜드명 기준 조회
-        stmt = select(Brand).where(Brand.brand_name == brand_data["brand_name"].strip())
-        result = await session.execute(stmt)
-        brand = result.scalars().first()
-
-        if brand:
-            return brand.brand_id  # 이미 존재하는 경우 해당 ID 반환
-
-        # 마지막 브랜드 ID 조회
-        last_id_query = select(func.max(Brand.brand_id))
-        last_id_result = await session.execute(last_id_query)
-        last_id = last_id_result.scalar() or 0  # None인 경우 0으로 설정
-        
-        new_brand_id = last_id + 1
-        print(f"생성할 새 브랜드 ID: {new_brand_id}")
-
-        # 없으면 새로 생성
-        new_brand = Brand(
-            brand_id=new_brand_id,
-            subsidiary_id=str(uuid.uuid4()),
-            brand_name=brand_data.get("brand_name", None),  # 기본값으로 None
-            main_phone_number=None,
+        # 브랜드명 유니크 인덱스 기준 upsert 한 번으로 ID 확보 (이미 존재하면 해당 ID 반환)
+        brand_id = await get_or_create_brand_id(
+            session,
+            brand_data["brand_name"],
             manager_email=brand_data.get("manager_email", None),
-            manager_phone_number=None,
-            sales_status=None,
-            sales_status_note=None,
-            category=None,
-            core_product_summary=None,
-            recent_brand_issues=None,
             last_updated_at=None
         )
-        session.add(new_brand)
-        await session.flush()  # brand_id 확보
         await session.commit()  # 데이터베이스에 실제 반영
-        session.close()
-        return new_brand.brand_id
+        return brand_id
 
     except SQLAlchemyError as e:
         print(f"❌ 브랜드 저장 중 오류 발생: {e}")
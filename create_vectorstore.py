@@ -1,95 +1,41 @@
 # create_vectorstore.py
+# CSV 로 벡터 인덱스를 처음부터 만드는 스크립트 (DB 변경분 반영은 vector_index_sync.py)
+# 문서 id 는 테이블 기본키라서 이후 vector_index_sync 가 같은 문서를 upsert/delete 할 수 있음
+# 인덱스 루트 아래 새 스냅샷 버전으로 만든 뒤 CURRENT 를 교체하므로 실행 중인 프로세스는 다음 조회부터 새 인덱스 사용
 import pandas as pd
-from langchain_core.documents import Document
-from langchain_community.vectorstores import Chroma
-from transformers import AutoTokenizer, AutoModel
-import torch
-import numpy as np
-import os
+from embedding import get_embedding_function
+from loaders.manifest import file_fingerprint
+from vector_index_sync import media_document, campaign_media_document, build_snapshot
 
-# BERT 임베딩 클래스 정의
-class BERTSentenceEmbedding:
-    def __init__(self, model_name="sentence-transformers/all-MiniLM-L6-v2"):
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModel.from_pretrained(model_name)
+def main(file_path="data/data_sample/media.csv", persist_directory="./chroma_media"):
+    # CSV 파일 로드 (첫 줄이 헤더)
+    df = pd.read_csv(file_path)
+    rows = df.to_dict("records")
 
-    def embed_documents(self, texts):
-        return [self._embed(text) for text in texts]
+    # 문서 생성
+    docs = [media_document(row) for row in rows]
+    ids = [str(row["media_id"]) for row in rows]
 
-    def embed_query(self, text):
-        return self._embed(text)
+    # 임베딩 함수 초기화
+    embedding_function = get_embedding_function()
 
-    def _embed(self, text):
-        inputs = self.tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=512)
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-        cls_embedding = outputs.last_hidden_state[:, 0, :].squeeze(0)
-        return cls_embedding.cpu().numpy().tolist()
+    # Chroma 벡터스토어 스냅샷 생성 (풀링 설정을 컬렉션 메타데이터로 기록, 정규화 벡터는 내적 거리)
+    version = build_snapshot(docs, ids, persist_directory, "media", source_hash=file_fingerprint(file_path))
 
-def main():
-    # CSV 파일 경로
-    file_path = "data/data_sample/media.csv"
-    
-    # CSV 파일 로드
-    df = pd.read_csv(file_path, header=None)
-    
-    # 컬럼명 정의
-    df.columns = [
-        "media_id",
-        "media_name",
-        "location",
-        "specification",
-        "slot_count",
-        "media_type",
-        "operating_hours",
-        "guaranteed_exposure",
-        "duration_seconds",
-        "quantity",
-        "unit_price",
-        "image_day_url",
-        "image_night_url",
-        "image_map_url",
-        "population_target",
-        "media_characteristics",
-        "case_examples"
-    ]
-    
-    # 문서 생성
-    docs = []
-    for i, row in df.iterrows():
-        doc = Document(
-            page_content=f"""
-            위치: {row['location']}
-            타겟: {row['population_target']}
-            매체 특징: {row['media_characteristics']}
-            집행 사례: {row['case_examples']}
-            """,
-            metadata={
-                "media_id": str(row["media_id"]),
-                "media_name": row["media_name"],
-                "location": row["location"],
-                "media_type": row["media_type"],
-                "population_target": row["population_target"],
-                "media_characteristics": row["media_characteristics"],
-                "case_examples": row["case_examples"]
-            }
-        )
-        docs.append(doc)
-    
-    # 임베딩 함수 초기화
-    embedding_function = BERTSentenceEmbedding()
-    
-    # Chroma 벡터스토어 생성 및 저장
-    persist_directory = "./chroma_media"
-    chroma_collection = Chroma.from_documents(
-        documents=docs,
-        embedding=embedding_function,
-        collection_name="media",
-        persist_directory=persist_directory
-    )
-    
-    print(f"벡터스토어가 {persist_directory}에 성공적으로 생성되었습니다.")
+    print(f"벡터스토어가 {persist_directory} (버전 {version})에 성공적으로 생성되었습니다.")
     print(f"총 {len(docs)}개의 문서가 저장되었습니다.")
+    if embedding_function.cache is not None:
+        print(f"임베딩 캐시: {embedding_function.cache.stats()}")
+
+def build_campaign_media_vectorstore(file_path="data/data_sample/campaign_media.csv", persist_directory="./chroma_db2"):
+    # report_agent 유사 집행 사례 검색용 campaign_media 컬렉션
+    df = pd.read_csv(file_path)
+    rows = df.to_dict("records")
+
+    docs = [campaign_media_document(row) for row in rows]
+    ids = [str(row["campaign_media_id"]) for row in rows]
+    version = build_snapshot(docs, ids, persist_directory, "campaign_media_chroma_hf", source_hash=file_fingerprint(file_path))
+    print(f"campaign_media 벡터스토어가 {persist_directory} (버전 {version})에 {len(docs)}개 문서로 생성되었습니다.")
 
 # if __name__ == "__main__":
-#     main()
\ No newline at end of file
+#     main()
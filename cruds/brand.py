@@ -0,0 +1,19 @@
+# brands 테이블 CRUD
+import uuid
+
+from sqlalchemy import func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.db_model import Brand
+
+
+async def get_or_create_brand_id(session: AsyncSession, brand_name: str, **fields) -> int:
+    # brand_name 유니크 인덱스 기준 INSERT ... ON DUPLICATE KEY UPDATE 한 번으로 brand_id 조회/생성
+    # 이미 있는 브랜드는 값을 바꾸지 않고 LAST_INSERT_ID(brand_id)로 기존 id를 돌려받음
+    # (max(brand_id)+1 방식과 달리 동시 요청에서도 id가 겹치지 않음)
+    values = {"subsidiary_id": str(uuid.uuid4()), **fields, "brand_name": brand_name.strip()}
+    stmt = mysql_insert(Brand).values(**values)
+    stmt = stmt.on_duplicate_key_update(brand_id=func.last_insert_id(Brand.brand_id))
+    result = await session.execute(stmt)
+    return result.lastrowid
@@ -0,0 +1,16 @@
+# brand_media_matches 테이블 CRUD
+from sqlalchemy import func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.db_model import BrandMediaMatch
+
+
+async def get_or_create_brand_media_match(session: AsyncSession, brand_id: int, media_id: int, **fields) -> BrandMediaMatch:
+    # (brand_id, media_id) 유니크 인덱스 기준 INSERT ... ON DUPLICATE KEY UPDATE 한 번으로 매치 조회/생성
+    # 이미 있는 매치는 값을 바꾸지 않고 LAST_INSERT_ID(id)로 기존 id를 돌려받은 뒤 다시 조회
+    # (조회 후 INSERT 방식과 달리 동시 요청이 유니크 인덱스에 부딪혀 매치가 빠지지 않음)
+    stmt = mysql_insert(BrandMediaMatch).values(**fields, brand_id=brand_id, media_id=media_id)
+    stmt = stmt.on_duplicate_key_update(id=func.last_insert_id(BrandMediaMatch.id))
+    result = await session.execute(stmt)
+    return await session.get(BrandMediaMatch, result.lastrowid)
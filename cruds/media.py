@@ -0,0 +1,48 @@
+# medias 테이블 조회
+# 판매 가능 매체 필터: quantity > 0, 매체 유형, 위치, 단가 범위, 기간 내 잔여 구좌(campaign_medias 기준)
+# report_agent(mysql.connector)와 SQLAlchemy 세션에서 같이 쓰도록 %s 파라미터 SQL 로 생성
+from sqlalchemy.ext.asyncio import AsyncSession
+
+MEDIA_FILTER_KEYS = ("media_type", "location", "min_price", "max_price", "start_date", "end_date", "required_slots")
+
+
+def available_media_query(columns=("*",), media_type=None, location=None, min_price=None, max_price=None,
+                          start_date=None, end_date=None, required_slots=1):
+    # (sql, params) 반환, 조건을 주지 않으면 quantity > 0 만 적용
+    conditions = ["m.quantity > 0"]
+    params = []
+
+    if media_type:
+        conditions.append("m.media_type = %s")
+        params.append(media_type)
+    if location:
+        conditions.append("m.location LIKE %s")
+        params.append(f"%{location}%")
+    if min_price is not None:
+        conditions.append("m.unit_price >= %s")
+        params.append(min_price)
+    if max_price is not None:
+        conditions.append("m.unit_price <= %s")
+        params.append(max_price)
+    if start_date or end_date:
+        # 기간이 겹치는 캠페인이 점유한 구좌를 빼고 남은 구좌가 required_slots 이상인 매체만
+        start_date = start_date or end_date
+        end_date = end_date or start_date
+        conditions.append(
+            "COALESCE(m.slot_count, 0) - COALESCE(("
+            "SELECT SUM(cm.slot_count) FROM campaign_medias cm "
+            "WHERE cm.media_id = m.media_id AND cm.start_date <= %s AND cm.end_date >= %s"
+            "), 0) >= %s"
+        )
+        params.extend([end_date, start_date, required_slots])
+
+    column_list = ", ".join("m.*" if name == "*" else f"m.`{name}`" for name in columns)
+    sql = f"SELECT {column_list} FROM medias m WHERE {' AND '.join(conditions)} ORDER BY m.media_id"
+    return sql, params
+
+
+async def fetch_available_media_ids(session: AsyncSession, **filters) -> list:
+    sql, params = available_media_query(columns=("media_id",), **filters)
+    conn = await session.connection()
+    result = await conn.exec_driver_sql(sql, tuple(params))
+    return [row[0] for row in result.all()]
@@ -0,0 +1,304 @@
+# 에이전트 공통 문장 임베딩
+# 토크나이저/모델은 프로세스당 한 번만 로드해서 모든 에이전트와 FastAPI 앱이 공유
+# 추론 백엔드는 EMBEDDING_BACKEND 환경변수로 선택:
+#   torch      - 기본 fp32 PyTorch
+#   torch-int8 - Linear 레이어 동적 int8 양자화 (CPU, 양자화 구현은 EMBEDDING_INT8_QUANTIZER 로 선택)
+#   onnx       - ONNX Runtime CPU 세션 (처음 사용할 때 ONNX_MODEL_DIR 아래로 export, onnxruntime 필요)
+# 풀링은 EMBEDDING_POOLING 환경변수로 선택 (mean: attention mask 평균 풀링, cls: CLS 토큰), 기본으로 L2 정규화
+# 정규화된 벡터는 내적 = 코사인 유사도라서 인덱스는 내적(ip) 거리로 만들고, 인덱스 메타데이터에 풀링 설정을 기록
+# get_embedding_function() 으로 얻은 임베딩은 영구 캐시(embedding_cache.py)를 거침
+import copy
+import os
+import threading
+import warnings
+
+import numpy as np
+import torch
+from transformers import AutoTokenizer, AutoModel
+
+from embedding_cache import cache_key, get_default_cache
+
+DEFAULT_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+# 한 번에 모델에 넣는 텍스트 수 (메모리/지연시간에 맞춰 EMBEDDING_BATCH_SIZE 로 조정)
+DEFAULT_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+DEFAULT_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "./onnx_models")
+# torch-int8 양자화 구현
+#   torch-ao - torch.ao.quantization.quantize_dynamic (deprecated, torch 에서 빠질 예정이지만 CPU 에서 가장 빠름)
+#   torchao  - torchao.quantization.quantize_ (Int8DynamicActivationInt8WeightConfig, torchao 패키지 필요)
+#   auto     - 설치된 torch 에 quantize_dynamic 이 남아 있으면 torch-ao, 없으면 torchao
+INT8_QUANTIZERS = ("auto", "torch-ao", "torchao")
+DEFAULT_INT8_QUANTIZER = os.getenv("EMBEDDING_INT8_QUANTIZER", "auto")
+POOLING_MODES = ("mean", "cls")
+DEFAULT_POOLING = os.getenv("EMBEDDING_POOLING", "mean")
+DEFAULT_NORMALIZE = os.getenv("EMBEDDING_NORMALIZE", "1").lower() not in ("0", "false", "no")
+
+_models = {}
+_backends = {}
+_embeddings = {}
+_lock = threading.RLock()
+
+
+def load_model(model_name=DEFAULT_MODEL_NAME):
+    # (tokenizer, model) 을 모델명별로 처음 요청될 때 한 번만 로드
+    with _lock:
+        if model_name not in _models:
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            model = AutoModel.from_pretrained(model_name)
+            model.eval()
+            _models[model_name] = (tokenizer, model)
+        return _models[model_name]
+
+
+class TorchBackend:
+    # 토크나이저 출력(pt 텐서)을 받아 last_hidden_state 를 numpy 배열로 반환
+    def __init__(self, model_name, model):
+        self.model = model
+
+    def __call__(self, inputs):
+        with torch.inference_mode():
+            outputs = self.model(**inputs)
+        return outputs.last_hidden_state.cpu().numpy()
+
+
+def _legacy_quantize_dynamic():
+    # torch.ao.quantization.quantize_dynamic (제거된 torch 버전이면 None)
+    quantization = getattr(getattr(torch, "ao", None), "quantization", None)
+    return getattr(quantization, "quantize_dynamic", None)
+
+
+def quantize_int8(model, quantizer=DEFAULT_INT8_QUANTIZER):
+    # model 의 Linear 레이어를 동적 int8 양자화한 모델과 실제로 쓴 구현 이름을 반환 (model 은 제자리에서 바뀜)
+    if quantizer not in INT8_QUANTIZERS:
+        raise ValueError(f"지원하지 않는 int8 양자화 구현: {quantizer} (사용 가능: {', '.join(INT8_QUANTIZERS)})")
+    quantize_dynamic = _legacy_quantize_dynamic()
+    if quantizer == "auto":
+        quantizer = "torch-ao" if quantize_dynamic is not None else "torchao"
+
+    if quantizer == "torch-ao":
+        if quantize_dynamic is None:
+            raise ImportError("설치된 torch 에 torch.ao.quantization.quantize_dynamic 이 없습니다. torchao 를 설치하세요.")
+        with warnings.catch_warnings():
+            # 알고 쓰는 deprecated API 라 경고는 숨김 (auto 는 이 API 가 제거되면 torchao 로 넘어감)
+            warnings.simplefilter("ignore", DeprecationWarning)
+            warnings.simplefilter("ignore", FutureWarning)
+            return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8), quantizer
+
+    try:
+        from torchao.quantization import Int8DynamicActivationInt8WeightConfig, quantize_
+    except ImportError as e:
+        raise ImportError("torch-int8 백엔드를 사용하려면 torchao 패키지를 설치하세요.") from e
+    quantize_(model, Int8DynamicActivationInt8WeightConfig())
+    return model, quantizer
+
+
+class QuantizedTorchBackend(TorchBackend):
+    def __init__(self, model_name, model, quantizer=DEFAULT_INT8_QUANTIZER):
+        # 공유 fp32 모델은 그대로 두고 복사본의 Linear 레이어만 int8 양자화
+        quantized, self.quantizer = quantize_int8(copy.deepcopy(model).eval(), quantizer)
+        super().__init__(model_name, quantized)
+
+    @property
+    def cache_tag(self) -> str:
+        # 양자화 구현마다 벡터가 조금씩 달라서 임베딩 캐시 키에 구현 이름까지 넣음
+        return f"torch-int8+{self.quantizer}"
+
+
+class OnnxBackend:
+    def __init__(self, model_name, model, onnx_dir=ONNX_MODEL_DIR):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("onnx 백엔드를 사용하려면 onnxruntime 패키지를 설치하세요.") from e
+
+        path = os.path.join(onnx_dir, model_name.replace("/", "__"), "model.onnx")
+        if not os.path.exists(path):
+            export_onnx(model, path)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    def __call__(self, inputs):
+        feed = {name: inputs[name].cpu().numpy() for name in self.input_names}
+        return self.session.run(["last_hidden_state"], feed)[0]
+
+
+class _OnnxExportWrapper(torch.nn.Module):
+    # transformers 버전마다 forward 위치 인자 순서가 달라서 키워드 인자로 고정
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, token_type_ids):
+        outputs = self.model(input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids)
+        return outputs.last_hidden_state
+
+
+def export_onnx(model, path):
+    # 배치 크기와 시퀀스 길이를 동적 축으로 export
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dummy = {name: torch.ones(1, 8, dtype=torch.long) for name in input_names}
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    tmp_path = path + ".tmp"
+    # export 가 끝나면 torch 가 래퍼의 학습 모드를 되돌리면서 공유 모델까지 train 모드로 바꾸므로
+    # 래퍼를 eval 로 두고, 끝난 뒤 공유 모델의 원래 모드를 복구 (train 모드면 dropout 이 켜져 torch 백엔드 결과가 흔들림)
+    training = model.training
+    try:
+        torch.onnx.export(
+            _OnnxExportWrapper(model).eval(),
+            (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+            tmp_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            dynamo=False,
+        )
+    finally:
+        model.train(training)
+    os.replace(tmp_path, path)
+
+
+BACKENDS = {
+    "torch": TorchBackend,
+    "torch-int8": QuantizedTorchBackend,
+    "onnx": OnnxBackend,
+}
+
+
+def load_backend(model_name=DEFAULT_MODEL_NAME, backend=DEFAULT_BACKEND):
+    # (모델명, 백엔드)별로 한 번만 생성
+    if backend not in BACKENDS:
+        raise ValueError(f"지원하지 않는 임베딩 백엔드: {backend} (사용 가능: {', '.join(BACKENDS)})")
+    with _lock:
+        key = (model_name, backend)
+        if key not in _backends:
+            _, model = load_model(model_name)
+            _backends[key] = BACKENDS[backend](model_name, model)
+        return _backends[key]
+
+
+class EmbeddingMismatchError(ValueError):
+    # 인덱스를 만들 때와 쿼리할 때의 임베딩 설정이 다름
+    pass
+
+
+# BERT 임베딩 클래스 (langchain embedding 인터페이스)
+class BERTSentenceEmbedding:
+    def __init__(self, model_name=DEFAULT_MODEL_NAME, batch_size=DEFAULT_BATCH_SIZE, max_length=512,
+                 backend=DEFAULT_BACKEND, cache=None, pooling=DEFAULT_POOLING, normalize=DEFAULT_NORMALIZE):
+        if pooling not in POOLING_MODES:
+            raise ValueError(f"지원하지 않는 풀링 방식: {pooling} (사용 가능: {', '.join(POOLING_MODES)})")
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.backend_name = backend
+        self.cache = cache
+        self.pooling = pooling
+        self.normalize = normalize
+        self.tokenizer, _ = load_model(model_name)
+        self.backend = load_backend(model_name, backend)
+
+    @property
+    def pooling_tag(self) -> str:
+        # 캐시 키와 인덱스 메타데이터에 쓰는 풀링 설정 (예: "mean+l2")
+        return f"{self.pooling}+l2" if self.normalize else self.pooling
+
+    def index_metadata(self) -> dict:
+        # 벡터 인덱스(Chroma 컬렉션) 생성 시 함께 저장할 메타데이터
+        return {
+            "embedding_model": self.model_name,
+            "pooling": self.pooling_tag,
+            "hnsw:space": "ip" if self.normalize else "l2",
+        }
+
+    def check_index_metadata(self, metadata, index_name="") -> None:
+        # 인덱스가 다른 모델/풀링으로 만들어졌으면 검색 품질이 조용히 떨어지므로 바로 실패
+        # 메타데이터가 없는 인덱스는 예전 방식(정규화 없는 CLS)으로 만든 것으로 간주
+        metadata = metadata or {}
+        built_with = (metadata.get("embedding_model", self.model_name), metadata.get("pooling", "cls"))
+        expected = (self.model_name, self.pooling_tag)
+        if built_with != expected:
+            raise EmbeddingMismatchError(
+                f"벡터 인덱스 {index_name} 의 임베딩 설정 {built_with} 이 쿼리 임베딩 설정 {expected} 과 다릅니다. "
+                "create_vectorstore.py 로 인덱스를 다시 만들거나 EMBEDDING_POOLING / EMBEDDING_NORMALIZE 를 맞추세요."
+            )
+
+    def embed_documents(self, texts):
+        # 캐시에 없는 텍스트만 모델로 임베딩하고 결과를 캐시에 저장
+        texts = list(texts)
+        if self.cache is None or not texts:
+            return self._embed_texts(texts)
+
+        keys = [self._cache_key(text) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        missing = list(dict.fromkeys(text for text, key in zip(texts, keys) if key not in vectors))
+        if missing:
+            computed = {
+                self._cache_key(text): vector
+                for text, vector in zip(missing, self._embed_texts(missing))
+            }
+            self.cache.put_many(computed.items())
+            vectors.update(computed)
+
+        return [vectors[key] for key in keys]
+
+    def _cache_key(self, text):
+        backend_tag = getattr(self.backend, "cache_tag", self.backend_name)
+        return cache_key(self.model_name, backend_tag, self.max_length, self.pooling_tag, text)
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def _embed_texts(self, texts):
+        # 토큰 길이순으로 정렬해 비슷한 길이끼리 배치로 묶고, 배치마다 그 배치의 최대 길이까지만 패딩
+        if not texts:
+            return []
+
+        lengths = [len(ids) for ids in self.tokenizer(texts, truncation=True, max_length=self.max_length)["input_ids"]]
+        order = sorted(range(len(texts)), key=lambda i: lengths[i])
+
+        embeddings = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch_index = order[start:start + self.batch_size]
+            vectors = self._embed_batch([texts[i] for i in batch_index])
+            for i, vector in zip(batch_index, vectors):
+                embeddings[i] = vector
+        return embeddings
+
+    def _embed_batch(self, texts):
+        inputs = self.tokenizer(texts, return_tensors="pt", truncation=True, padding=True, max_length=self.max_length)
+        last_hidden_state = self.backend(inputs)
+
+        if self.pooling == "mean":
+            # 패딩 토큰을 제외한 토큰 벡터 평균 (sentence-transformers 학습 방식)
+            mask = inputs["attention_mask"].cpu().numpy()[:, :, None].astype(last_hidden_state.dtype)
+            pooled = (last_hidden_state * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        else:
+            pooled = last_hidden_state[:, 0, :]
+
+        if self.normalize:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.tolist()
+
+
+def get_embedding_function(model_name=DEFAULT_MODEL_NAME, backend=DEFAULT_BACKEND, pooling=DEFAULT_POOLING,
+                           normalize=DEFAULT_NORMALIZE, batch_size=DEFAULT_BATCH_SIZE) -> BERTSentenceEmbedding:
+    # (모델명, 백엔드, 풀링, 정규화, 배치 크기)별 싱글톤 임베딩 객체
+    key = (model_name, backend, pooling, normalize, batch_size)
+    embedding = _embeddings.get(key)
+    if embedding is None:
+        with _lock:
+            embedding = _embeddings.get(key)
+            if embedding is None:
+                embedding = _embeddings[key] = BERTSentenceEmbedding(
+                    model_name, batch_size=batch_size, backend=backend, cache=get_default_cache(), pooling=pooling,
+                    normalize=normalize,
+                )
+    return embedding
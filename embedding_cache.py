@@ -0,0 +1,161 @@
+# 임베딩 영구 캐시 (SQLite)
+# key = sha256(모델명, 추론 백엔드, 최대 토큰 길이, 풀링 설정, 텍스트) → float32 벡터, 최대 항목 수를 넘으면 가장 오래 안 쓴 항목부터 삭제 (LRU)
+# 조회 시 사용 시각(last_used) 갱신은 메모리에 모아 두었다가 한 번에 기록 (히트마다 UPDATE + commit 하지 않음)
+# - 모인 key 가 EMBEDDING_CACHE_TOUCH_BATCH 개 이상이거나 마지막 기록 후 EMBEDDING_CACHE_TOUCH_INTERVAL 초가 지나면 기록
+# - put_many 의 LRU 삭제 전에는 항상 먼저 기록 (최근에 쓴 항목이 삭제되지 않게)
+import atexit
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+# 기본 위치는 실행 디렉터리와 무관하게 저장소의 data/cache/ 아래
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cache", "embedding_cache.sqlite3"),
+)
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+EMBEDDING_CACHE_TOUCH_BATCH = int(os.getenv("EMBEDDING_CACHE_TOUCH_BATCH", "1000"))
+EMBEDDING_CACHE_TOUCH_INTERVAL = float(os.getenv("EMBEDDING_CACHE_TOUCH_INTERVAL", "60"))
+
+# SQLite 바인드 변수 개수 제한을 넘지 않도록 나눠서 조회
+_QUERY_CHUNK = 500
+
+
+def cache_key(model_name: str, backend: str, max_length: int, pooling: str, text: str) -> str:
+    # 백엔드(torch / torch-int8 / onnx)나 max_length 가 다르면 벡터도 달라지므로 키에 포함
+    return hashlib.sha256(f"{model_name}\0{backend}\0{max_length}\0{pooling}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path=EMBEDDING_CACHE_PATH, max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+                 touch_batch=EMBEDDING_CACHE_TOUCH_BATCH, touch_interval=EMBEDDING_CACHE_TOUCH_INTERVAL):
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_batch = touch_batch
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # 아직 기록하지 않은 사용 시각 {key: last_used}
+        self._pending_touches = {}
+        self._last_flush = time.monotonic()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        # 항목 수는 열 때 한 번만 세고 이후에는 메모리에서 증감 (쓰기마다 COUNT(*) 전체 스캔을 하지 않음)
+        # 같은 파일을 다른 프로세스도 쓰면 근사값이 되지만 LRU 삭제 기준으로는 충분
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys) -> dict:
+        # 캐시에 있는 key만 {key: vector(list)} 로 반환, 사용 시각은 메모리에 모았다가 배치로 기록
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), _QUERY_CHUNK):
+                chunk = keys[start:start + _QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            if found:
+                now = time.time()
+                self._pending_touches.update((key, now) for key in found)
+                if (len(self._pending_touches) >= self.touch_batch
+                        or time.monotonic() - self._last_flush >= self.touch_interval):
+                    self._flush_touches()
+                    self._conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def _flush_touches(self):
+        # 모아 둔 사용 시각을 기록 (commit 은 호출한 쪽에서, self._lock 을 잡은 상태에서 호출)
+        if self._pending_touches:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(last_used, key) for key, last_used in self._pending_touches.items()],
+            )
+            self._pending_touches.clear()
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+
+    def put_many(self, items):
+        # items: [(key, vector)] 저장 후 최대 항목 수를 넘으면 LRU 삭제
+        now = time.time()
+        rows = {key: (key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in items}
+        if not rows:
+            return
+        with self._lock:
+            self._flush_touches()
+            # 이미 있는 key 는 덮어쓰기라 항목 수가 늘지 않음 (기본 키 조회라 전체 스캔 없음)
+            keys = list(rows)
+            existing = 0
+            for start in range(0, len(keys), _QUERY_CHUNK):
+                chunk = keys[start:start + _QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                existing += self._conn.execute(
+                    f"SELECT COUNT(*) FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchone()[0]
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                                   rows.values())
+            self._count += len(rows) - existing
+            if self._count > self.max_entries:
+                # last_used 인덱스 순으로 넘친 만큼만 삭제
+                cursor = self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    " SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (self._count - self.max_entries,),
+                )
+                self._count -= cursor.rowcount
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._count
+            total = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    # EMBEDDING_CACHE=0 이면 캐시 사용 안 함
+    global _default_cache
+    if os.getenv("EMBEDDING_CACHE", "1").lower() in ("0", "false", "no"):
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache()
+            # 종료 시 아직 기록하지 않은 사용 시각 기록
+            atexit.register(_default_cache.flush)
+        return _default_cache
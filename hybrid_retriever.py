@@ -0,0 +1,183 @@
+# 매체 하이브리드 검색 (어휘 BM25 + 벡터)
+# 영어 MiniLM 은 강남/명동/올림픽대로 같은 한국어 지명을 잘 못 잡아서
+# media_name, location, population_target, media_characteristics 에 대한 문자 n-gram BM25 역색인을 메모리에 두고
+# 벡터 검색 순위와 RRF(reciprocal rank fusion)로 합침
+# 점수는 RRF 점수 (클수록 유사) 이고, 나머지 인터페이스는 media_index.NumpyMediaIndex 와 같음
+import hashlib
+import math
+import re
+import threading
+from collections import Counter
+
+from langchain_core.documents import Document
+
+from media_index import batch_similarity_search_with_score, matches_filter
+
+LEXICAL_FIELDS = ("media_name", "location", "population_target", "media_characteristics")
+NGRAM_RANGE = (2, 3)
+RRF_K = 60
+CANDIDATE_K = 50
+
+_TOKEN_RE = re.compile(r"[0-9a-z가-힣]+")
+
+
+def lexical_terms(text, ngram_range=NGRAM_RANGE):
+    # 토큰 자체 + 토큰 안의 문자 n-gram (띄어쓰기/조사가 달라도 "강남" 이 "강남대로" 와 매칭되도록)
+    terms = []
+    for token in _TOKEN_RE.findall(str(text).lower()):
+        terms.append(token)
+        for n in range(ngram_range[0], ngram_range[1] + 1):
+            if len(token) > n:
+                terms.extend(token[i:i + n] for i in range(len(token) - n + 1))
+    return terms
+
+
+class BM25Index:
+    # 문서 추가/삭제 시 역색인과 문서 빈도를 그 문서 분량만 갱신
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.doc_terms = {}
+        self.doc_lengths = {}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    def add(self, doc_id, text):
+        self.remove(doc_id)
+        terms = Counter(lexical_terms(text))
+        self.doc_terms[doc_id] = terms
+        self.doc_lengths[doc_id] = sum(terms.values())
+        self.total_length += self.doc_lengths[doc_id]
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+
+    def remove(self, doc_id):
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        for term in terms:
+            posting = self.postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self.postings[term]
+
+    def search(self, query, k=CANDIDATE_K, allowed=None):
+        # [(doc_id, score)] 점수 내림차순, allowed 가 주어지면 그 문서만
+        if not self.doc_terms:
+            return []
+        n = len(self.doc_terms)
+        avg_length = self.total_length / n
+        scores = {}
+        for term in set(lexical_terms(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    # rankings: [[doc_id, ...], ...] 각 순위 목록 → {doc_id: sum(1 / (k + rank))}
+    fused = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return fused
+
+
+class HybridMediaRetriever:
+    def __init__(self, vectorstore, fields=LEXICAL_FIELDS, rrf_k=RRF_K, candidate_k=CANDIDATE_K):
+        self.vectorstore = vectorstore
+        self.fields = fields
+        self.rrf_k = rrf_k
+        self.candidate_k = candidate_k
+        self.bm25 = BM25Index()
+        self.documents = {}
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def _lexical_text(self, document):
+        values = [document.metadata.get(name) for name in self.fields]
+        values = [str(value) for value in values if value]
+        return " ".join(values) if values else document.page_content
+
+    def _load_documents(self):
+        if hasattr(self.vectorstore, "documents"):
+            return list(self.vectorstore.documents)
+        data = self.vectorstore._collection.get(include=["documents", "metadatas"])
+        return [
+            Document(page_content=text or "", metadata=metadata or {})
+            for text, metadata in zip(data["documents"], data["metadatas"])
+        ]
+
+    def refresh(self, documents=None):
+        # 매체가 바뀐 뒤 호출: 내용이 달라진 문서만 역색인에서 교체하고 사라진 문서는 삭제
+        # 반환값은 (추가/변경 수, 삭제 수)
+        documents = self._load_documents() if documents is None else list(documents)
+        latest = {}
+        for document in documents:
+            media_id = str(document.metadata.get("media_id"))
+            text = self._lexical_text(document)
+            latest[media_id] = (document, text, hashlib.md5(text.encode("utf-8")).hexdigest())
+
+        with self._lock:
+            removed = [media_id for media_id in self.documents if media_id not in latest]
+            for media_id in removed:
+                self.bm25.remove(media_id)
+                del self.documents[media_id]
+                del self._fingerprints[media_id]
+
+            changed = 0
+            for media_id, (document, text, fingerprint) in latest.items():
+                self.documents[media_id] = document
+                if self._fingerprints.get(media_id) != fingerprint:
+                    self.bm25.add(media_id, text)
+                    self._fingerprints[media_id] = fingerprint
+                    changed += 1
+        return changed, len(removed)
+
+    def swap_vectorstore(self, vectorstore):
+        # 새 인덱스 버전으로 벡터 검색 대상을 바꾸고 어휘 색인은 바뀐 문서만 갱신
+        self.vectorstore = vectorstore
+        return self.refresh()
+
+    def _fuse(self, query, dense_results, k, filter):
+        with self._lock:
+            allowed = None
+            if filter:
+                allowed = {media_id for media_id, document in self.documents.items() if matches_filter(document.metadata, filter)}
+            lexical = self.bm25.search(query, self.candidate_k, allowed)
+            documents = dict(self.documents)
+
+        dense_ids = []
+        for document, _ in dense_results:
+            media_id = str(document.metadata.get("media_id"))
+            documents.setdefault(media_id, document)
+            dense_ids.append(media_id)
+
+        fused = reciprocal_rank_fusion([dense_ids, [media_id for media_id, _ in lexical]], self.rrf_k)
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(documents[media_id], score) for media_id, score in ranked]
+
+    def similarity_search_with_score(self, query, k=4, filter=None):
+        dense_results = self.vectorstore.similarity_search_with_score(query, k=self.candidate_k, filter=filter)
+        return self._fuse(query, dense_results, k, filter)
+
+    def batch_similarity_search_with_score(self, queries, k=4, filter=None):
+        # 벡터 검색은 배치 한 번, 어휘 검색과 RRF 는 쿼리마다
+        queries = list(queries)
+        dense_batches = batch_similarity_search_with_score(self.vectorstore, queries, self.candidate_k, filter)
+        return [self._fuse(query, dense_results, k, filter) for query, dense_results in zip(queries, dense_batches)]
+
+    def similarity_search(self, query, k=4, filter=None):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
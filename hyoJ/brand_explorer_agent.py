@@ -7,11 +7,11 @@ from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 import ast
 import re
-import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 from models.db_model import Brand  # Brand 모델 import
+from cruds.brand import get_or_create_brand_id
 from datetime import datetime
 
 search_tool = TavilySearch()
@@ -147,55 +147,34 @@ def brand_explorer_agent(state: AgentState) -> AgentState:
 
 async def save_brands_to_mariadb(fields: dict, session: AsyncSession):
     try:
-        saved_brands = []
+        brand_ids = []
 
         for i in range(len(fields.get("brand_list", []))):
             brand_name = fields["brand_list"][i].strip()
 
-            # 이미 존재하는 브랜드인지 확인
-            stmt = select(Brand).where(Brand.brand_name == brand_name)
-            result = await session.execute(stmt)
-            existing_brand = result.scalars().first()
-
-            if existing_brand:
-                print(f"✅ 이미 존재: {brand_name}")
-                saved_brands.append(existing_brand)
-                continue  # 다음 브랜드로 넘어감
-            
-            # 가장 큰 brand_id 가져오기
-            max_id_stmt = select(func.max(Brand.brand_id))
-            max_id_result = await session.execute(max_id_stmt)
-            max_brand_id = max_id_result.scalar() or 0  # None일 경우 0으로 처리
-            new_brand_id = max_brand_id + 1
-
-            # 새 브랜드 객체 생성
-            new_brand = Brand(
-                brand_id=new_brand_id,
-                subsidiary_id=str(uuid.uuid4()),
-                brand_name=brand_name,
-                main_phone_number=None,
-                manager_email=None,
-                manager_phone_number=None,
+            # 브랜드명 기준 upsert: 이미 존재하면 기존 brand_id, 없으면 새로 저장한 brand_id
+            brand_id = await get_or_create_brand_id(
+                session,
+                brand_name,
                 sales_status=fields["sales_status"],
-                sales_status_note=None,
                 category=fields.get("category", None),
                 core_product_summary=fields["core_product_summary"][i],
                 recent_brand_issues=fields["recent_brand_issues"][i],
                 last_updated_at=fields["last_updated_at"]
             )
+            brand_ids.append(brand_id)
 
-            session.add(new_brand)
-            await session.flush()
-            await session.refresh(new_brand)
-            saved_brands.append(new_brand)
-
-            print(f"✅ 새로 저장: {brand_name}")
+            print(f"✅ 저장/확인: {brand_name}")
 
         await session.commit()
+
+        # 저장된 브랜드 객체는 한 번의 쿼리로 조회 (입력 순서 유지)
+        result = await session.execute(select(Brand).where(Brand.brand_id.in_(brand_ids)))
+        brands_by_id = {brand.brand_id: brand for brand in result.scalars().all()}
+        saved_brands = [brands_by_id[brand_id] for brand_id in brand_ids if brand_id in brands_by_id]
         return saved_brands
 
     except SQLAlchemyError as e:
         print(f"❌ 오류 발생: {e}")
         await session.rollback()
         return None
-    
\ No newline at end of file
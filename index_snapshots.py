@@ -0,0 +1,134 @@
+# 벡터 인덱스 스냅샷 (버전 디렉터리 + "current" 포인터)
+# 인덱스 루트(./chroma_media, ./chroma_db2) 구조:
+#   versions/<버전>/            Chroma persist 디렉터리 + manifest.json (모델, 풀링, 문서 수, 소스 해시, 워터마크)
+#   CURRENT                     현재 버전명 (임시 파일에 쓰고 os.replace 로 원자적 교체)
+# 빌드/동기화는 항상 새 버전 디렉터리에 쓰고 끝난 뒤 CURRENT 만 바꾸므로 읽는 쪽은 중간 상태를 보지 않음
+# CURRENT 가 없으면 예전 방식(루트 자체가 persist 디렉터리)으로 간주
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+MANIFEST_FILE = "manifest.json"
+# 롤백/읽는 중인 프로세스를 위해 남겨둘 이전 버전 수
+KEEP_VERSIONS = int(os.getenv("INDEX_KEEP_VERSIONS", "5"))
+
+
+def _write_atomic(path: str, content: str):
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def current_version(root: str):
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def version_path(root: str, version: str) -> str:
+    return os.path.join(root, VERSIONS_DIR, version)
+
+
+def resolve_index_path(root: str):
+    # (버전, Chroma persist 디렉터리) 반환, 스냅샷이 없으면 (None, root)
+    version = current_version(root)
+    if version is None:
+        return None, root
+    return version, version_path(root, version)
+
+
+def list_versions(root: str) -> list:
+    directory = os.path.join(root, VERSIONS_DIR)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name for name in os.listdir(directory) if os.path.isdir(os.path.join(directory, name)))
+
+
+def create_version(root: str, copy_from: str = None):
+    # 새 버전 디렉터리 생성 (copy_from 이 있으면 그 버전 내용을 복사해서 시작), (버전, 경로) 반환
+    version = datetime.now().strftime("%Y%m%d%H%M%S%f")
+    path = version_path(root, version)
+    if copy_from:
+        shutil.copytree(version_path(root, copy_from), path)
+    else:
+        os.makedirs(path)
+    return version, path
+
+
+def read_manifest(path: str) -> dict:
+    try:
+        with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def write_manifest(path: str, manifest: dict):
+    _write_atomic(os.path.join(path, MANIFEST_FILE), json.dumps(manifest, ensure_ascii=False, indent=2, default=str))
+
+
+def publish_version(root: str, version: str, keep: int = KEEP_VERSIONS):
+    # CURRENT 포인터를 새 버전으로 교체하고 오래된 버전 정리
+    if not os.path.isdir(version_path(root, version)):
+        raise FileNotFoundError(f"인덱스 버전이 없습니다: {version_path(root, version)}")
+    _write_atomic(os.path.join(root, CURRENT_FILE), version)
+    prune_versions(root, keep)
+
+
+def rollback(root: str, version: str = None) -> str:
+    # 지정한 버전(기본: 현재 바로 이전 버전)으로 CURRENT 를 되돌림
+    versions = list_versions(root)
+    if version is None:
+        current = current_version(root)
+        older = [name for name in versions if current is None or name < current]
+        if not older:
+            raise ValueError(f"{root} 에 되돌릴 이전 버전이 없습니다.")
+        version = older[-1]
+    elif version not in versions:
+        raise FileNotFoundError(f"인덱스 버전이 없습니다: {version_path(root, version)}")
+    _write_atomic(os.path.join(root, CURRENT_FILE), version)
+    return version
+
+
+def prune_versions(root: str, keep: int = KEEP_VERSIONS):
+    current = current_version(root)
+    versions = list_versions(root)
+    for version in versions[:-keep] if keep > 0 else []:
+        if version != current:
+            shutil.rmtree(version_path(root, version), ignore_errors=True)
+
+
+def documents_hash(documents, ids) -> str:
+    # 문서 id/내용/메타데이터 기준 소스 해시
+    digest = hashlib.sha256()
+    for doc_id, document in sorted(zip(ids, documents), key=lambda item: item[0]):
+        payload = json.dumps([doc_id, document.page_content, document.metadata], sort_keys=True, ensure_ascii=False, default=str)
+        digest.update(payload.encode("utf-8"))
+    return digest.hexdigest()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="벡터 인덱스 스냅샷 조회/롤백")
+    parser.add_argument("root", help="인덱스 루트 (예: ./chroma_media)")
+    parser.add_argument("--rollback", nargs="?", const="", metavar="VERSION", help="지정 버전(기본: 직전 버전)으로 CURRENT 되돌리기")
+    args = parser.parse_args()
+
+    if args.rollback is not None:
+        print(f"CURRENT -> {rollback(args.root, args.rollback or None)}")
+    current = current_version(args.root)
+    for version in list_versions(args.root):
+        manifest = read_manifest(version_path(args.root, version))
+        marker = "*" if version == current else " "
+        print(f"{marker} {version} rows={manifest.get('row_count')} model={manifest.get('embedding_model')} "
+              f"pooling={manifest.get('pooling')} source={str(manifest.get('source_hash'))[:12]}")
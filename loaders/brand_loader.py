@@ -1,38 +1,22 @@
+# csv 파일 비동기 처리 및 DB 저장
 import pandas as pd
 from sqlalchemy.ext.asyncio import AsyncSession
 from models.db_model import Brand
-from sqlalchemy.future import select
-from datetime import datetime
+from loaders.manifest import load_changed_records
+from loaders.normalize import parse_dates, frame_to_records
+
+def to_records(df: pd.DataFrame) -> list:
+    # last_updated_at 변환 처리 (컬럼 단위)
+    if "last_updated_at" not in df.columns:
+        df["last_updated_at"] = None
+    parse_dates(df, {"last_updated_at": "%Y-%m-%d %H:%M:%S"})
+    return frame_to_records(df, Brand)
 
 async def load_brand(file_path: str, db: AsyncSession):
     df = pd.read_csv(file_path)
+    records = to_records(df)
 
-    for _, row in df.iterrows():
-        result = await db.execute(
-            select(Brand).filter(Brand.brand_id == row["brand_id"])
-        )
-        existing_brand = result.scalar_one_or_none()
-
-        if existing_brand is None:
-            # last_updated_at 변환 처리
-            last_updated = None
-            if pd.notna(row.get("last_updated_at", None)):
-                last_updated = datetime.strptime(row["last_updated_at"], "%Y-%m-%d %H:%M:%S")
-
-            brand = Brand(
-                brand_id=row["brand_id"],
-                subsidiary_id=row["subsidiary_id"],
-                brand_name=row["brand_name"],
-                main_phone_number=row["main_phone_number"],
-                manager_email=row["manager_email"],
-                manager_phone_number=row["manager_phone_number"],
-                sales_status=row["sales_status"],
-                sales_status_note=row["sales_status_note"],
-                category=row["category"],
-                core_product_summary=row["core_product_summary"],
-                recent_brand_issues=row["recent_brand_issues"],
-                last_updated_at=last_updated
-            )
-            db.add(brand)
-
+    # 이전 로드 이후 바뀐 행만 한번에 저장
+    await load_changed_records(db, Brand, records, file_path)
     await db.commit()
+    return len(df)
@@ -0,0 +1,89 @@
+# 로더 공통 bulk insert / upsert 처리
+# 행마다 SELECT 후 INSERT 하던 방식 대신, 입력 행의 기존 키를 배치 단위 IN 조회로 확인하고 배치 단위 executemany 로 저장
+# (테이블 전체 키를 미리 읽지 않으므로 메모리는 테이블 크기가 아니라 입력 배치 크기에 비례)
+from sqlalchemy import insert, tuple_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _key_columns(model, key_columns=None):
+    # 키 컬럼을 지정하지 않으면 기본키 사용
+    if key_columns is None:
+        return [column.name for column in model.__table__.primary_key.columns]
+    return list(key_columns)
+
+
+def _chunks(records, batch_size):
+    for start in range(0, len(records), batch_size):
+        yield records[start:start + batch_size]
+
+
+def _key_filter(columns, keys):
+    # 단일 컬럼은 col IN (...), 복합키는 (a, b) IN ((..), ..)
+    if len(columns) == 1:
+        return columns[0].in_([key[0] for key in keys])
+    return tuple_(*columns).in_(keys)
+
+
+async def fetch_existing_keys(db: AsyncSession, model, keys, key_columns=None,
+                              batch_size: int = DEFAULT_BATCH_SIZE) -> set:
+    # keys(키 튜플 목록) 중 테이블에 이미 존재하는 키만 배치 단위 IN 조회로 확인
+    names = _key_columns(model, key_columns)
+    columns = [model.__table__.c[name] for name in names]
+    existing = set()
+    for chunk in _chunks(list(dict.fromkeys(keys)), batch_size):
+        result = await db.execute(select(*columns).where(_key_filter(columns, chunk)))
+        existing.update(tuple(row) for row in result.all())
+    return existing
+
+
+async def bulk_insert_missing(db: AsyncSession, model, records: list, key_columns=None,
+                              batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    # DB 및 입력 내에 없는 키를 가진 행만 배치 단위로 INSERT (기존 행은 건드리지 않음)
+    if not records:
+        return 0
+
+    names = _key_columns(model, key_columns)
+    seen = await fetch_existing_keys(db, model, [tuple(record[name] for name in names) for record in records],
+                                     names, batch_size)
+
+    to_insert = []
+    for record in records:
+        key = tuple(record[name] for name in names)
+        if key in seen:
+            continue
+        seen.add(key)
+        to_insert.append(record)
+
+    table = model.__table__
+    for chunk in _chunks(to_insert, batch_size):
+        await db.execute(insert(table), chunk)
+
+    return len(to_insert)
+
+
+async def bulk_upsert(db: AsyncSession, model, records: list, update_columns=None,
+                      batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    # INSERT ... ON DUPLICATE KEY UPDATE 로 키 충돌 시 지정 컬럼만 갱신
+    if not records:
+        return 0
+
+    table = model.__table__
+    if update_columns is None:
+        keys = set(_key_columns(model))
+        update_columns = [name for name in records[0] if name not in keys]
+
+    stmt = mysql_insert(table)
+    if update_columns:
+        stmt = stmt.on_duplicate_key_update({name: stmt.inserted[name] for name in update_columns})
+    else:
+        stmt = stmt.prefix_with("IGNORE")
+
+    for chunk in _chunks(records, batch_size):
+        await db.execute(stmt, chunk)
+
+    return len(records)
+
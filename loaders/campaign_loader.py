@@ -1,26 +1,17 @@
 import pandas as pd
 from models.db_model import Campaign
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from datetime import datetime
+from loaders.manifest import load_changed_records
+from loaders.normalize import parse_dates, frame_to_records
+
+def to_records(df: pd.DataFrame) -> list:
+    parse_dates(df, {"start_date": "%Y-%m-%d", "end_date": "%Y-%m-%d"})
+    return frame_to_records(df, Campaign)
 
 async def load_campaign(file_path: str, db: AsyncSession):
     df = pd.read_csv(file_path)
-    
-    for _, row in df.iterrows():
-        result = await db.execute(select(Campaign).filter(Campaign.campaign_id == row["campaign_id"]))
-        existing_campaign = result.scalar_one_or_none()
-
-        if existing_campaign is None:
-            campaign = Campaign(
-                campaign_id=row["campaign_id"],
-                brand_id=row["brand_id"],
-                campaign_name=row["campaign_name"],
-                start_date=datetime.strptime(row["start_date"], "%Y-%m-%d") if pd.notna(row["start_date"]) else None,
-                end_date=datetime.strptime(row["end_date"], "%Y-%m-%d") if pd.notna(row["end_date"]) else None,
-                campaign_status=row["campaign_status"],  # 문자열 그대로 저장
-                total_budget=row["total_budget"]
-            )
-            db.add(campaign)
+    records = to_records(df)
 
+    await load_changed_records(db, Campaign, records, file_path)
     await db.commit()
+    return len(df)
@@ -1,14 +1,94 @@
+import asyncio
+import logging
+import os
+import time
+
 from loaders.brand_loader import load_brand
 from loaders.media_loader import load_media
 from loaders.campaign_loader import load_campaign
 from loaders.campaign_media_loader import load_campaign_media
 from loaders.sales_log_loader import load_sales_log
 from loaders.media_match_loader import load_brand_media_match
+from loaders.manifest import file_fingerprint, get_manifest, save_manifest
+
+logger = logging.getLogger(__name__)
+
+# sales_log는 통화 전문(call_full_text)이 커서 청크 단위로 스트리밍 로드
+SALES_LOG_CHUNKSIZE = 5000
+
+# DATA_LOAD_FAST_PATH=1 이면 LOAD DATA LOCAL INFILE 고속 경로를 먼저 시도 (서버/클라이언트 local_infile 필요)
+DATA_LOAD_FAST_PATH = os.getenv("DATA_LOAD_FAST_PATH", "0").lower() in ("1", "true", "yes")
+
+# 이름: (로더 함수, CSV 경로, 선행 로더, 추가 인자)
+# 선행 로더는 FK 순서 (brands → campaigns → campaign_medias, brands/medias → brand_media_matches)
+LOADER_GRAPH = {
+    "brands": (load_brand, "data/data_sample/brand.csv", (), {}),
+    "medias": (load_media, "data/data_sample/media.csv", (), {}),
+    "campaigns": (load_campaign, "data/data_sample/campaign.csv", ("brands",), {}),
+    "sales_logs": (load_sales_log, "data/data_sample/sales_log.csv", ("brands",), {"chunksize": SALES_LOG_CHUNKSIZE}),
+    "campaign_medias": (load_campaign_media, "data/data_sample/campaign_media.csv", ("campaigns", "medias"), {}),
+    "brand_media_matches": (load_brand_media_match, "data/data_sample/media_match.csv", ("brands", "medias"), {}),
+}
+
+async def _fast_load(name, file_path):
+    # LOAD DATA LOCAL INFILE 고속 경로 시도, 성공하면 행 수 / 실패하면 None (pandas 로더로 대체)
+    from loaders.fast_loader import FAST_PATH_TABLES, fast_load_table, fast_session
+
+    if name not in FAST_PATH_TABLES:
+        return None
+    try:
+        async with fast_session() as session:
+            return await fast_load_table(name, file_path, session)
+    except Exception:
+        logger.warning("%s 고속 로드 실패, pandas 로더로 대체", name, exc_info=True)
+        return None
+
+async def load_all_data(session_factory, graph: dict = LOADER_GRAPH, force: bool = False,
+                        fast_path: bool = DATA_LOAD_FAST_PATH) -> dict:
+    # 선행 로더가 끝난 로더부터 동시에 실행, 로더마다 별도 세션 사용
+    # 매니페스트의 파일 해시와 같으면 해당 로더는 생략 (force=True면 항상 로드)
+    # fast_path=True면 LOAD DATA LOCAL INFILE 경로를 먼저 시도 (기본값은 DATA_LOAD_FAST_PATH 환경변수)
+    # 고속 경로도 행 해시를 같이 저장하므로 성공하면 매니페스트를 갱신 (다음 기동 때 로드 생략)
+    # 반환값: 로더별 소요 시간(초)
+    timings = {}
+    tasks = {}
+
+    async def run_loader(name):
+        loader, file_path, depends_on, kwargs = graph[name]
+        await asyncio.gather(*(tasks[dep] for dep in depends_on))
+
+        start = time.perf_counter()
+        content_hash = await asyncio.to_thread(file_fingerprint, file_path)
+        async with session_factory() as session:
+            manifest = await get_manifest(session, file_path)
+            if not force and manifest is not None and manifest.content_hash == content_hash:
+                timings[name] = time.perf_counter() - start
+                logger.info("%s 변경 없음, 로드 생략 (%.2fs)", name, timings[name])
+                return
+
+            row_count = await _fast_load(name, file_path) if fast_path else None
+            if row_count is not None:
+                await save_manifest(session, file_path, content_hash, row_count)
+                await session.commit()
+                timings[name] = time.perf_counter() - start
+                logger.info("%s 고속 로드 완료 (%.2fs)", name, timings[name])
+                return
+
+            row_count = await loader(file_path, session, **kwargs)
+            await save_manifest(session, file_path, content_hash, row_count)
+            await session.commit()
+        timings[name] = time.perf_counter() - start
+        logger.info("%s 로드 완료 (%.2fs)", name, timings[name])
+
+    for name in graph:
+        tasks[name] = asyncio.ensure_future(run_loader(name))
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except Exception:
+        # 하나라도 실패하면 남은 로더는 취소
+        for task in tasks.values():
+            task.cancel()
+        raise
 
-async def load_all_data(session):
-    await load_brand("data/data_sample/brand.csv", session)
-    await load_media("data/data_sample/media.csv", session)
-    await load_campaign("data/data_sample/campaign.csv", session)
-    await load_campaign_media("data/data_sample/campaign_media.csv", session)
-    await load_sales_log("data/data_sample/sales_log.csv", session)
-    await load_brand_media_match("data/data_sample/media_match.csv", session)
+    return timings
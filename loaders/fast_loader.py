@@ -0,0 +1,152 @@
+# 대량 재적재용 LOAD DATA LOCAL INFILE 고속 경로
+# CSV를 테이블 컬럼 순서의 TSV로 스테이징 → 임시 테이블에 LOAD DATA → INSERT ... SELECT 로 병합
+# 스테이징하면서 pandas 로더와 같은 방식으로 행 해시도 계산해 load_manifest_rows 에 같이 병합
+# (다음 로드 때 pandas 경로가 전체 행을 다시 해시/조회/저장하지 않도록)
+# 서버에서 local_infile이 꺼져 있으면 실패하므로 호출하는 쪽에서 pandas 로더로 대체
+import asyncio
+import os
+import tempfile
+from datetime import date, datetime
+
+import pandas as pd
+from sqlalchemy import Date, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from db import create_db_engine
+from models.db_model import Brand, Media, Campaign, CampaignMedia, SalesLog, BrandMediaMatch
+from loaders import brand_loader, media_loader, campaign_loader, campaign_media_loader, sales_log_loader, media_match_loader
+from loaders.manifest import row_hash, row_key
+
+STAGE_CHUNKSIZE = 50000
+
+# 테이블명: (모델, 레코드 변환 함수, read_csv 옵션, 중복 판단 키)
+FAST_PATH_TABLES = {
+    "brands": (Brand, brand_loader.to_records, {}, ("brand_id",)),
+    "medias": (Media, media_loader.to_records, {}, ("media_id",)),
+    "campaigns": (Campaign, campaign_loader.to_records, {}, ("campaign_id",)),
+    "campaign_medias": (CampaignMedia, campaign_media_loader.to_records, {}, ("campaign_media_id",)),
+    "sales_logs": (SalesLog, sales_log_loader.to_records, {"na_filter": False}, ("sales_log_id",)),
+    "brand_media_matches": (BrandMediaMatch, media_match_loader.to_records, {}, ("brand_id", "media_id")),
+}
+
+_fast_engine = None
+_fast_session_factory = None
+
+
+def fast_session():
+    # LOAD DATA LOCAL INFILE은 클라이언트 쪽 local_infile 옵션이 필요해서 별도 엔진 사용
+    global _fast_engine, _fast_session_factory
+    if _fast_session_factory is None:
+        _fast_engine = create_db_engine(connect_args={"local_infile": True})
+        _fast_session_factory = sessionmaker(bind=_fast_engine, class_=AsyncSession, expire_on_commit=False)
+    return _fast_session_factory()
+
+
+def _load_columns(model) -> list:
+    # server_default 로 DB가 채우는 컬럼(last_updated_at 등)은 스테이징/INSERT 대상에서 제외
+    return [column.name for column in model.__table__.columns if column.server_default is None]
+
+
+def _format_value(value, as_date: bool = False) -> str:
+    # LOAD DATA 기본 이스케이프 규칙(ESCAPED BY '\\')에 맞춘 값 변환, NULL은 \N
+    if value is None or value is pd.NaT:
+        return "\\N"
+    if isinstance(value, float) and value != value:
+        return "\\N"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, datetime):
+        # Date 컬럼은 시간 부분을 떼어서 저장 (DATE 컬럼 truncation 경고 방지)
+        return value.strftime("%Y-%m-%d") if as_date else value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def stage_csv(table_name: str, file_path: str, stage_path: str, hash_path: str,
+              chunksize: int = STAGE_CHUNKSIZE) -> int:
+    # CSV를 청크 단위로 읽어 모델 컬럼 순서의 TSV 파일로 저장, 반환값은 행 수
+    # hash_path 에는 (row_key, row_hash) TSV 를 저장 (manifest.load_changed_records 와 같은 키/해시)
+    model, to_records, read_options, key_columns = FAST_PATH_TABLES[table_name]
+    columns = _load_columns(model)
+    date_columns = {column.name for column in model.__table__.columns if isinstance(column.type, Date)}
+    row_count = 0
+
+    with open(stage_path, "w", encoding="utf-8", newline="") as f, \
+            open(hash_path, "w", encoding="utf-8", newline="") as hashes:
+        for chunk in pd.read_csv(file_path, chunksize=chunksize, **read_options):
+            for record in to_records(chunk):
+                f.write("\t".join(_format_value(record.get(name), name in date_columns) for name in columns))
+                f.write("\n")
+                hashes.write(f"{_format_value(row_key(record, key_columns))}\t{row_hash(record)}\n")
+            row_count += len(chunk)
+
+    return row_count
+
+
+def _load_data_sql(table: str, column_list: str) -> str:
+    return (
+        f"LOAD DATA LOCAL INFILE :path INTO TABLE {table} "
+        "CHARACTER SET utf8mb4 "
+        "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+        "LINES TERMINATED BY '\\n' "
+        f"({column_list})"
+    )
+
+
+async def fast_load_table(table_name: str, file_path: str, db: AsyncSession) -> int:
+    # 스테이징 → 임시 테이블 LOAD DATA → 키가 없는 행만 INSERT ... SELECT, 행 해시는 매니페스트에 UPSERT
+    model, _, _, key_columns = FAST_PATH_TABLES[table_name]
+    columns = _load_columns(model)
+    column_list = ", ".join(f"`{name}`" for name in columns)
+    staging = f"stg_{table_name}"
+    hash_staging = f"stg_{table_name}_hashes"
+
+    fd, stage_path = tempfile.mkstemp(prefix=f"{staging}_", suffix=".tsv")
+    os.close(fd)
+    fd, hash_path = tempfile.mkstemp(prefix=f"{hash_staging}_", suffix=".tsv")
+    os.close(fd)
+    try:
+        # 스테이징은 CPU/파일 I/O 작업이라 이벤트 루프를 막지 않도록 스레드에서 실행
+        row_count = await asyncio.to_thread(stage_csv, table_name, file_path, stage_path, hash_path)
+
+        await db.execute(text(f"DROP TEMPORARY TABLE IF EXISTS {staging}"))
+        await db.execute(text(f"CREATE TEMPORARY TABLE {staging} LIKE {table_name}"))
+        await db.execute(text(_load_data_sql(staging, column_list)), {"path": stage_path})
+        match = " AND ".join(f"t.`{name}` = s.`{name}`" for name in key_columns)
+        select_list = ", ".join(f"s.`{name}`" for name in columns)
+        await db.execute(text(
+            f"INSERT INTO {table_name} ({column_list}) "
+            f"SELECT {select_list} FROM {staging} s "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {table_name} t WHERE {match})"
+        ))
+        await db.execute(text(f"DROP TEMPORARY TABLE {staging}"))
+
+        await db.execute(text(f"DROP TEMPORARY TABLE IF EXISTS {hash_staging}"))
+        await db.execute(text(
+            f"CREATE TEMPORARY TABLE {hash_staging} "
+            "(row_key VARCHAR(100) NOT NULL, row_hash CHAR(32) NOT NULL)"
+        ))
+        await db.execute(text(_load_data_sql(hash_staging, "row_key, row_hash")), {"path": hash_path})
+        await db.execute(
+            text(
+                "INSERT INTO load_manifest_rows (file_path, row_key, row_hash) "
+                f"SELECT :file_path, row_key, row_hash FROM {hash_staging} "
+                "ON DUPLICATE KEY UPDATE row_hash = VALUES(row_hash)"
+            ),
+            {"file_path": file_path},
+        )
+        await db.execute(text(f"DROP TEMPORARY TABLE {hash_staging}"))
+        await db.commit()
+    finally:
+        os.remove(stage_path)
+        os.remove(hash_path)
+
+    return row_count
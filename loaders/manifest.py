@@ -0,0 +1,88 @@
+# CSV 로드 매니페스트
+# 파일 내용 해시가 같으면 로드 자체를 생략하고, 바뀐 파일은 행 해시가 달라진 행만 DB에 반영
+import hashlib
+import json
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from models.db_model import LoadManifest, LoadManifestRow
+from loaders.bulk_upsert import DEFAULT_BATCH_SIZE, _chunks, _key_columns, bulk_insert_missing, bulk_upsert
+
+
+def file_fingerprint(file_path: str, block_size: int = 1 << 20) -> str:
+    # 파일 전체를 메모리에 올리지 않고 블록 단위로 sha256 계산
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def row_hash(record: dict) -> str:
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+def row_key(record: dict, key_columns) -> str:
+    # load_manifest_rows.row_key (키 컬럼 값을 | 로 연결)
+    return "|".join(str(record[name]) for name in key_columns)
+
+
+async def get_manifest(db: AsyncSession, file_path: str):
+    result = await db.execute(select(LoadManifest).filter_by(file_path=file_path))
+    return result.scalar_one_or_none()
+
+
+async def save_manifest(db: AsyncSession, file_path: str, content_hash: str, row_count: int):
+    await bulk_upsert(db, LoadManifest, [{
+        "file_path": file_path,
+        "content_hash": content_hash,
+        "row_count": row_count,
+        "loaded_at": datetime.now(),
+    }])
+
+
+async def fetch_row_hashes(db: AsyncSession, file_path: str, row_keys, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    # 이전 로드 때 저장한 행 해시 중 row_keys 에 해당하는 것만 {row_key: row_hash} (배치 단위 IN 조회)
+    hashes = {}
+    for chunk in _chunks(list(dict.fromkeys(row_keys)), batch_size):
+        result = await db.execute(
+            select(LoadManifestRow.row_key, LoadManifestRow.row_hash)
+            .filter_by(file_path=file_path)
+            .where(LoadManifestRow.row_key.in_(chunk))
+        )
+        hashes.update(result.all())
+    return hashes
+
+
+async def load_changed_records(db: AsyncSession, model, records: list, file_path: str, key_columns=None) -> int:
+    # 행 해시가 이전 로드와 다른 행만 반영
+    # - 처음 보는 행: DB에 없을 때만 INSERT (기존 DB 데이터는 덮어쓰지 않음)
+    # - 해시가 바뀐 행: CSV 내용으로 UPSERT
+    # 이전 해시와 기존 키는 이번 records 의 키만 조회하므로 청크 단위로 호출하면 메모리가 청크 크기에 비례
+    names = _key_columns(model, key_columns)
+    row_keys = [row_key(record, names) for record in records]
+    stored_hashes = await fetch_row_hashes(db, file_path, row_keys)
+
+    new_records = []
+    changed_records = []
+    hash_rows = []
+    for record, key in zip(records, row_keys):
+        hash_value = row_hash(record)
+        previous = stored_hashes.get(key)
+        if previous == hash_value:
+            continue
+
+        if previous is None:
+            new_records.append(record)
+        else:
+            changed_records.append(record)
+        stored_hashes[key] = hash_value
+        hash_rows.append({"file_path": file_path, "row_key": key, "row_hash": hash_value})
+
+    written = await bulk_insert_missing(db, model, new_records, key_columns=key_columns)
+    written += await bulk_upsert(db, model, changed_records)
+    await bulk_upsert(db, LoadManifestRow, hash_rows, update_columns=["row_hash"])
+    return written
@@ -0,0 +1,34 @@
+# 로더 공통 컬럼 정규화
+# 행마다 strptime / pd.notna 를 호출하던 방식 대신 컬럼 단위로 한 번에 변환
+import pandas as pd
+
+NULL_STRINGS = ("", "nan")
+
+
+def parse_dates(df: pd.DataFrame, columns: dict) -> pd.DataFrame:
+    # {컬럼명: 날짜 포맷} (포맷이 None이면 pandas 추론)
+    for column, date_format in columns.items():
+        df[column] = pd.to_datetime(df[column], format=date_format)
+    return df
+
+
+def blank_to_none(df: pd.DataFrame, columns) -> pd.DataFrame:
+    # 빈 문자열이나 'nan' 문자열을 None으로 변환
+    for column in columns:
+        df[column] = df[column].astype(object).where(~df[column].isin(NULL_STRINGS), None)
+    return df
+
+
+def to_bool(df: pd.DataFrame, columns) -> pd.DataFrame:
+    # 0/1 (또는 '0'/'1') 컬럼을 bool로 변환
+    for column in columns:
+        df[column] = df[column].astype(int).astype(bool)
+    return df
+
+
+def frame_to_records(df: pd.DataFrame, model) -> list:
+    # 모델 컬럼 순서대로 dict 목록 생성, NaN/NaT는 None으로 (값은 파이썬 기본 타입)
+    columns = [column.name for column in model.__table__.columns if column.name in df.columns]
+    frame = df[columns].astype(object)
+    frame = frame.where(frame.notna(), None)
+    return frame.to_dict("records")
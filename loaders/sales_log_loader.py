@@ -1,44 +1,40 @@
 import pandas as pd
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 from models.db_model import SalesLog
+from loaders.manifest import load_changed_records
+from loaders.normalize import parse_dates, blank_to_none, to_bool, frame_to_records
 
-async def load_sales_log(file_path: str, db: AsyncSession):
-    # 빈 문자열을 NaN으로 변환하지 않도록 na_filter=False 설정
-    df = pd.read_csv(file_path, na_filter=False)
+def to_records(df: pd.DataFrame) -> list:
+    # 문자열 → datetime 변환 (청크 단위 컬럼 연산)
+    parse_dates(df, {"contact_time": None, "last_updated_at": None})
+    # 빈 문자열이나 'nan' 문자열을 None으로 변환
+    blank_to_none(df, ["proposal_url"])
+    # CSV의 boolean 값을 명시적으로 변환
+    to_bool(df, ["is_proposal_generated"])
+    return frame_to_records(df, SalesLog)
 
-    # 문자열 → datetime 변환
-    df["contact_time"] = pd.to_datetime(df["contact_time"])
-    df["last_updated_at"] = pd.to_datetime(df["last_updated_at"])
+async def load_sales_log(file_path: str, db: AsyncSession, chunksize: int = None, progress_callback=None):
+    # chunksize를 지정하면 파일 전체를 메모리에 올리지 않고 청크 단위로 읽어서 청크마다 커밋
+    # progress_callback(처리한 행 수, 저장한 행 수)으로 진행 상황 전달
+    if chunksize is None:
+        # 빈 문자열을 NaN으로 변환하지 않도록 na_filter=False 설정
+        df = pd.read_csv(file_path, na_filter=False)
+        # 이전 로드 이후 바뀐 행만 배치 단위로 저장
+        written = await load_changed_records(db, SalesLog, to_records(df), file_path)
+        await db.commit()
+        if progress_callback:
+            progress_callback(len(df), written)
+        return len(df)
 
-    for _, row in df.iterrows():
-        result = await db.execute(select(SalesLog).filter_by(sales_log_id=row["sales_log_id"]))
-        existing_log = result.scalar_one_or_none()
+    # 기존 sales_log_id와 이전 행 해시는 청크마다 그 청크의 키만 조회 (메모리가 파일/테이블 크기와 무관)
+    processed = 0
+    written = 0
 
-        if existing_log is None:
-            # 빈 문자열이나 'nan' 문자열을 None으로 변환
-            proposal_url = row["proposal_url"]
-            if proposal_url == '' or proposal_url == 'nan':
-                proposal_url = None
-            
-            log = SalesLog(
-                sales_log_id=row["sales_log_id"],
-                brand_id=row["brand_id"],
-                brand_name=row["brand_name"],
-                manager_name=row["manager_name"],
-                manager_email=row["manager_email"],
-                agent_name=row["agent_name"],
-                contact_time=row["contact_time"],
-                contact_method=row["contact_method"],
-                call_full_text=row["call_full_text"],
-                call_memo=row["call_memo"],
-                client_needs_summary=row["client_needs_summary"],
-                sales_status=row["sales_status"],
-                proposal_url=proposal_url,
-                is_proposal_generated=bool(int(row["is_proposal_generated"])),  # CSV의 boolean 값을 명시적으로 변환
-                last_updated_at=row["last_updated_at"],
-                remarks=row["remarks"]
-            )
-            db.add(log)
+    for chunk in pd.read_csv(file_path, na_filter=False, chunksize=chunksize):
+        written += await load_changed_records(db, SalesLog, to_records(chunk), file_path)
+        await db.commit()
+        processed += len(chunk)
+        if progress_callback:
+            progress_callback(processed, written)
 
-    await db.commit()
\ No newline at end of file
+    return processed
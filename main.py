@@ -1,8 +1,11 @@
 # main.py
+import logging
 from fastapi import FastAPI, Depends
 from db import AsyncSessionLocal
 from loaders.data_loader import load_all_data
-from db import init_db, get_db
+from db import init_db, get_db, get_pool_metrics
+from vector_index_sync import sync_all_vector_indexes
+from async_executor import run_blocking, shutdown_executors
 
 app = FastAPI()
 
@@ -10,13 +13,27 @@ app = FastAPI()
 async def startup_event():
     try:
         await init_db() # 테이블 생성
-        async with AsyncSessionLocal() as session:
-            await load_all_data(session) # 데이터 로드
+        timings = await load_all_data(AsyncSessionLocal) # 데이터 로드 (의존 순서대로 병렬 실행, DATA_LOAD_FAST_PATH=1 이면 고속 경로)
+        logging.info("데이터 로드 소요 시간: %s", {name: round(sec, 2) for name, sec in timings.items()})
     except Exception as e:
-        import logging
         logging.exception("Startup data loading failed")
         raise e
 
+    # 벡터 인덱스에 DB 변경분만 반영 (실패해도 기존 인덱스로 서비스는 계속)
+    try:
+        await sync_all_vector_indexes(AsyncSessionLocal)
+    except Exception:
+        logging.exception("Vector index sync failed")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    shutdown_executors()
+
+@app.get("/pool_metrics")
+async def pool_metrics():
+    # DB 커넥션 풀 사용 현황 (pool_size / max_overflow 조정용)
+    return get_pool_metrics()
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from hyoJ.prototype import CallingState, run, save_to_mariadb_async
 @app.get("/process_call_data")
@@ -27,8 +44,8 @@ async def process_call_data(session: AsyncSession = Depends(get_db)):
         messages=[]  # 예시로 빈 리스트로 설정
     )
 
-    # run 함수 실행하여 결과 얻기
-    fields = run(state)
+    # run 함수 실행하여 결과 얻기 (전사/요약은 블로킹 작업이라 스레드 풀에서 실행)
+    fields = await run_blocking(run, state)
 
     # 비동기적으로 MariaDB에 데이터 저장
     await save_to_mariadb_async(fields, session)
@@ -47,8 +64,8 @@ async def process_brands(session: AsyncSession = Depends(get_db)):
         time_filter="최근 1개월"  # 예시 필터
     )
 
-    # 1. 브랜드 이슈 탐색
-    fields = brand_explorer_agent(state)
+    # 1. 브랜드 이슈 탐색 (동기 웹 검색/LLM 호출이라 스레드 풀에서 실행)
+    fields = await run_blocking(brand_explorer_agent, state)
 
     # 2. MariaDB에 저장
     saved = await save_brands_to_mariadb(fields, session)
@@ -59,7 +76,8 @@ async def process_brands(session: AsyncSession = Depends(get_db)):
         "brand_names": fields["brand_list"]
     }
 
-from hyoJ.media_matcher_agent import media_matcher_agent, save_brand_and_media_match
+from hyoJ.media_matcher_agent import amatch_media_batch, save_brand_and_media_match
+from cruds.media import fetch_available_media_ids
 
 @app.get("/match_media")
 async def match_media(session: AsyncSession = Depends(get_db)):
@@ -81,27 +99,30 @@ async def match_media(session: AsyncSession = Depends(get_db)):
 
     manager_name = "손지영"
 
-    saved_matches = []
-
-    for i in range(len(fields["brand_list"])):
-        brand_name = fields["brand_list"][i]
-        category = fields["category"][i]
-        recent_issue = fields["recent_brand_issues"][i]
-        core_product_summary = fields["core_product_summary"][i]
-
-        media_result = media_matcher_agent(
-            brand_name=brand_name,
-            recent_issue=recent_issue,
-            core_product_summary=core_product_summary,
-            manager_name=manager_name
+    # 임베딩/검색은 한 번에(검색 스레드 풀), LLM 생성은 브랜드별로 동시에(async) 실행해서 이벤트 루프를 막지 않음
+    brands = [
+        {
+            "brand_name": brand_name,
+            "recent_issue": recent_issue,
+            "core_product_summary": core_product_summary
+        }
+        for brand_name, recent_issue, core_product_summary in zip(
+            fields["brand_list"], fields["recent_brand_issues"], fields["core_product_summary"]
         )
+    ]
+    # 판매 가능한 매체(quantity > 0)로 후보를 먼저 좁힌 뒤 벡터 검색
+    media_ids = await fetch_available_media_ids(session)
+    media_results = await amatch_media_batch(brands, manager_name, media_ids=media_ids)
+
+    saved_matches = []
 
+    for brand, category, media_result in zip(brands, fields["category"], media_results):
         save_result = await save_brand_and_media_match(
             {
-                "brand_name": brand_name,
+                "brand_name": brand["brand_name"],
                 "category": category,
-                "core_product_summary": core_product_summary,
-                "recent_brand_issues": recent_issue
+                "core_product_summary": brand["core_product_summary"],
+                "recent_brand_issues": brand["recent_issue"]
             },
             media_result,
             session
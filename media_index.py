@@ -0,0 +1,141 @@
+# 매체 카탈로그용 인메모리 정확 검색(exact search) 인덱스
+# 매체 임베딩 전체를 연속된 float32 행렬 하나로 들고 있다가
+# 쿼리마다 행렬-벡터 곱 한 번 + argpartition 으로 top-k 를 구함 (수천 건 규모에서는 Chroma 왕복보다 빠름)
+# media_matcher_agent 가 쓰는 similarity_search_with_score 인터페이스를 그대로 제공
+# 점수는 Chroma 와 같은 "거리" (작을수록 유사): 정규화 임베딩은 1 - 내적, 아니면 L2 제곱 거리
+# filter 는 Chroma where 형식 중 {"필드": 값} / {"필드": {"$in": [...]}} 를 지원 (검색 전에 후보를 제한)
+import numpy as np
+from langchain_core.documents import Document
+
+from embedding import get_embedding_function
+
+
+def matches_filter(metadata, filter) -> bool:
+    # Chroma where 형식 중 {"필드": 값} / {"필드": {"$in": [...]}} 만 지원
+    if not filter:
+        return True
+    for name, condition in filter.items():
+        value = metadata.get(name)
+        if isinstance(condition, dict):
+            if value not in condition["$in"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class NumpyMediaIndex:
+    def __init__(self, documents, embeddings, embedding_function=None):
+        self.embedding_function = embedding_function or get_embedding_function()
+        self.documents = list(documents)
+        self.matrix = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32).reshape(len(self.documents), -1))
+        self.normalized = getattr(self.embedding_function, "normalize", False)
+        self._sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+    @classmethod
+    def from_documents(cls, documents, embedding_function=None):
+        embedding_function = embedding_function or get_embedding_function()
+        documents = list(documents)
+        embeddings = embedding_function.embed_documents([doc.page_content for doc in documents])
+        return cls(documents, embeddings, embedding_function)
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore, embedding_function=None):
+        # 이미 만들어진 Chroma 컬렉션의 임베딩을 그대로 가져와서 재계산하지 않음
+        data = vectorstore._collection.get(include=["embeddings", "documents", "metadatas"])
+        documents = [
+            Document(page_content=text or "", metadata=metadata or {})
+            for text, metadata in zip(data["documents"], data["metadatas"])
+        ]
+        embeddings = data["embeddings"] if len(data["embeddings"]) else np.zeros((0, 0), dtype=np.float32)
+        return cls(documents, embeddings, embedding_function or vectorstore.embeddings)
+
+    def __len__(self):
+        return len(self.documents)
+
+    def _distances(self, queries):
+        # queries: (q, d) → (q, n) 거리 행렬
+        scores = queries @ self.matrix.T
+        if self.normalized:
+            return 1.0 - scores
+        return self._sq_norms[None, :] - 2.0 * scores + np.einsum("ij,ij->i", queries, queries)[:, None]
+
+    def _filter_mask(self, filter):
+        return np.fromiter((matches_filter(doc.metadata, filter) for doc in self.documents), dtype=bool,
+                           count=len(self.documents))
+
+    def _top_k(self, distances, k):
+        # 행마다 argpartition 으로 k개만 고른 뒤 그 k개만 정렬
+        n = distances.shape[1]
+        k = min(k, n)
+        if k <= 0:
+            return [[] for _ in range(distances.shape[0])]
+        if k < n:
+            candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.tile(np.arange(n), (distances.shape[0], 1))
+        rows = np.arange(distances.shape[0])[:, None]
+        order = np.argsort(distances[rows, candidates], axis=1)
+        top = candidates[rows, order]
+        return [
+            [(self.documents[i], float(distances[row, i])) for i in top[row]]
+            for row in range(distances.shape[0])
+        ]
+
+    def batch_similarity_search_by_vector_with_score(self, embeddings, k=4, filter=None):
+        # 쿼리 임베딩 행렬 (q, d) 를 한 번의 행렬 곱으로 검색, 입력 순서대로 결과 반환
+        queries = np.asarray(embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        if len(self.documents) == 0:
+            return [[] for _ in range(len(queries))]
+
+        distances = self._distances(queries)
+        if filter:
+            # 조건에 맞지 않는 문서는 거리를 무한대로 두고 k를 후보 수로 제한
+            mask = self._filter_mask(filter)
+            distances[:, ~mask] = np.inf
+            k = min(k, int(mask.sum()))
+        return self._top_k(distances, k)
+
+    def batch_similarity_search_with_score(self, queries, k=4, filter=None):
+        embeddings = self.embedding_function.embed_documents(list(queries))
+        return self.batch_similarity_search_by_vector_with_score(embeddings, k, filter)
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4, filter=None):
+        return self.batch_similarity_search_by_vector_with_score([embedding], k, filter)[0]
+
+    def similarity_search_with_score(self, query, k=4, filter=None):
+        return self.similarity_search_by_vector_with_score(self.embedding_function.embed_query(query), k, filter)
+
+    def similarity_search(self, query, k=4, filter=None):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+
+def media_id_filter(media_ids):
+    # DB에서 걸러낸 매체 id 목록 → 벡터 검색 filter (Chroma 메타데이터 media_id 는 문자열)
+    if media_ids is None:
+        return None
+    return {"media_id": {"$in": [str(media_id) for media_id in media_ids]}}
+
+
+def batch_similarity_search_with_score(vectorstore, queries, k=4, filter=None):
+    # 여러 쿼리를 한 번에 임베딩하고 한 번의 검색으로 처리 (입력 순서대로 결과 반환)
+    # NumpyMediaIndex 는 행렬 곱 한 번, Chroma 는 collection.query 에 쿼리 임베딩을 한꺼번에 전달
+    queries = list(queries)
+    if not queries:
+        return []
+    if hasattr(vectorstore, "batch_similarity_search_with_score"):
+        return vectorstore.batch_similarity_search_with_score(queries, k, filter=filter)
+
+    embeddings = vectorstore.embeddings.embed_documents(queries)
+    result = vectorstore._collection.query(
+        query_embeddings=embeddings, n_results=k, where=filter, include=["documents", "metadatas", "distances"]
+    )
+    return [
+        [
+            (Document(page_content=text or "", metadata=metadata or {}), distance)
+            for text, metadata, distance in zip(texts, metadatas, distances)
+        ]
+        for texts, metadatas, distances in zip(result["documents"], result["metadatas"], result["distances"])
+    ]
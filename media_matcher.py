@@ -0,0 +1,235 @@
+# media_matcher.py
+# 매체 매칭 공통 로직 (media_matcher_agent.py / hyoJ/media_matcher_agent.py 가 같이 씀)
+from langchain_openai import ChatOpenAI
+from vectorstore_registry import DEFAULT_RETRIEVER, get_vectorstore, reload_vectorstore
+from media_index import batch_similarity_search_with_score, media_id_filter
+from async_executor import run_search
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextlib
+import os
+import threading
+from datetime import datetime
+
+# match_media_batch / amatch_media_batch 에서 동시에 보낼 최대 LLM 요청 수 (브랜드당 스크립트 + 이메일 2건)
+MATCH_MAX_WORKERS = int(os.getenv("MATCH_MAX_WORKERS", "8"))
+MATCH_LLM_MODEL = os.getenv("MATCH_LLM_MODEL", "gpt-4o-mini")
+
+_llm = None
+_llm_lock = threading.Lock()
+
+def get_llm():
+    # 프로세스당 ChatOpenAI 클라이언트 하나 (HTTP 커넥션 풀 재사용, 스레드/코루틴에서 같이 써도 됨)
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                _llm = ChatOpenAI(model=MATCH_LLM_MODEL, temperature=0)
+    return _llm
+
+def load_vectorstore(persist_directory="./chroma_media", collection_name="media", reload=False, kind=DEFAULT_RETRIEVER):
+    # 레지스트리에 캐시된 벡터스토어 핸들 (호출마다 Chroma 클라이언트를 새로 열지 않음)
+    # kind="numpy" 면 메모리 행렬 정확 검색, "hybrid" 면 BM25 + 벡터 RRF 검색 (MEDIA_RETRIEVER 환경변수)
+    if reload:
+        return reload_vectorstore(persist_directory, collection_name, kind)
+    return get_vectorstore(persist_directory, collection_name, kind)
+
+def build_query_text(recent_issue, core_product_summary):
+    # 쿼리 텍스트 구성
+    return f"{recent_issue} / {core_product_summary}"
+
+def extract_top_match(results):
+    # 첫 번째 매체만 추출
+    top_match = None
+    for doc, _ in results:
+        meta = doc.metadata
+        reason = f"{meta['population_target']}을 타겟으로 하며, '{meta['media_characteristics']}' 특성을 가짐. '{meta['case_examples']}' 등 유사 캠페인 존재."
+        top_match = {
+            "media_id": meta["media_id"],
+            "media_name": meta["media_name"],
+            "location": meta["location"],
+            "media_type": meta["media_type"],
+            "match_reason": reason
+        }
+        break  # 첫 번째 결과만 사용
+    return top_match
+
+def build_script_prompt(brand_name, recent_issue, core_product_summary, top_match):
+    # 전화 스크립트 프롬프트
+    return f"""
+    브랜드명: {brand_name}
+    최근 마케팅 이슈: {recent_issue}
+    브랜드 설명: {core_product_summary}
+    추천 매체: {top_match['media_name']} ({top_match['location']}) - {top_match['match_reason']}
+
+    위 정보를 바탕으로, {brand_name}의 담당자에게 전화할 때 사용할 영업 스크립트를 3-5줄로 작성해주세요.
+    스크립트는 다음을 포함해야 합니다:
+    - 인사 및 자기소개
+    - 브랜드의 최근 이슈 언급
+    - 추천 매체({top_match['media_name']})가 왜 적합한지 설명
+    - 미팅 제안
+    
+    실제 영업 전화 통화처럼 정중하지만 자연스럽게 작성해주세요.
+    """
+
+def build_email_prompt(brand_name, recent_issue, core_product_summary, manager_name, top_match):
+    # 이메일 프롬프트
+    return f"""
+    브랜드명: {brand_name}
+    최근 마케팅 이슈: {recent_issue}
+    브랜드 설명: {core_product_summary}
+    담당자 이름: {manager_name}
+    추천 매체: {top_match['media_name']} ({top_match['location']}) - {top_match['match_reason']}
+
+    위 정보를 바탕으로, 다음 정확한 형식에 맞춰 이메일을 작성해주세요:
+
+    안녕하세요.  
+    옥외광고 매체사 <올이즈굿>의 광고팀 {manager_name} 매니저입니다.
+
+    {brand_name}에 적합한 옥외광고인  
+    {top_match['media_name']}를 소개해 드리고자 메일을 남기게 되었습니다.
+
+    {{해당 매체 간단 특징}} 다음과 같은 특징을 가지고 있습니다:
+
+    {{해당 매체의 특징 및 왜 {brand_name}에 적합한지 3가지 이유 설명}}
+
+    이외에도 저희 올이즈굿은 올림픽대로 야립광고와 지하철, 버스 등 여러 교통 매체뿐 아니라  
+    이태원/강남/명동 등 서울 주요 지역의 옥외 매체를 활용한 마케팅 솔루션을 제공하고 있습니다.
+
+    첨부된 소개서에서 {top_match['media_name']}와 다른 매체들을 함께 확인하실 수 있습니다.  
+    확인 후 회신 주시면, 전화나 미팅을 통해 더 자세히 안내해 드리겠습니다 :)
+
+    긴 메일 읽어주셔서 감사합니다.  
+    올이즈굿 {manager_name} 드림
+
+    주의사항:
+    1. {manager_name} 부분은 실제 값을 사용합니다.
+    2. {{해당 매체 간단 특징}} 부분은 {top_match['media_name']}에 대한 간단한 한 줄 설명으로 대체하세요.
+    3. {{해당 매체의 특징 및 왜 적합한지 3가지 이유 설명}} 부분은 {top_match['media_name']}의 특징과 {brand_name}에 왜 적합한지 3가지 이유를 번호를 매겨 설명하세요.
+    4. 위 형식을 정확히 따라 줄바꿈과 공백도 동일하게 유지하세요.
+    """
+
+def build_match_result(top_match, sales_call_script, proposal_email):
+    now = datetime.now()
+    formatted = now.strftime("%Y-%m-%d %H:%M:%S")
+
+    # 결과 반환
+    return {
+
+        "media_id" : top_match["media_id"],
+        "media_name": top_match["media_name"],
+        "location": top_match["location"],
+        "media_type": top_match["media_type"],
+        "match_reason": top_match["match_reason"],
+
+        "sales_call_script": sales_call_script,
+        "proposal_email": proposal_email,
+
+        "generated_at" : formatted, 
+        "used_in_sales" : False, 
+        "last_updated_at" : formatted
+    }
+
+def _invoke_text(llm, prompt):
+    return llm.invoke(prompt).content.strip()
+
+async def _ainvoke_text(llm, prompt, semaphore=None):
+    async with semaphore or contextlib.nullcontext():
+        return (await llm.ainvoke(prompt)).content.strip()
+
+def submit_match_generation(executor, llm, brand_name, recent_issue, core_product_summary, manager_name, top_match):
+    # 전화 스크립트와 이메일은 top_match 에만 의존하므로 두 요청을 동시에 제출, (스크립트, 이메일) future 반환
+    return (
+        executor.submit(_invoke_text, llm, build_script_prompt(brand_name, recent_issue, core_product_summary, top_match)),
+        executor.submit(_invoke_text, llm, build_email_prompt(brand_name, recent_issue, core_product_summary, manager_name, top_match)),
+    )
+
+def generate_match_result(llm, brand_name, recent_issue, core_product_summary, manager_name, top_match):
+    # 스크립트/이메일 생성을 동시에 실행 (브랜드당 소요 시간은 둘 중 느린 쪽)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        script, email = submit_match_generation(executor, llm, brand_name, recent_issue, core_product_summary, manager_name, top_match)
+        return build_match_result(top_match, script.result(), email.result())
+
+async def agenerate_match_result(llm, brand_name, recent_issue, core_product_summary, manager_name, top_match, semaphore=None):
+    # generate_match_result 의 비동기 버전 (네이티브 async OpenAI 호출, 스크립트/이메일 동시 생성)
+    # semaphore 가 주어지면 요청마다 하나씩 잡아서 전체 동시 요청 수를 제한
+    sales_call_script, proposal_email = await asyncio.gather(
+        _ainvoke_text(llm, build_script_prompt(brand_name, recent_issue, core_product_summary, top_match), semaphore),
+        _ainvoke_text(llm, build_email_prompt(brand_name, recent_issue, core_product_summary, manager_name, top_match), semaphore),
+    )
+    return build_match_result(top_match, sales_call_script, proposal_email)
+
+def _check_media_ids(media_ids):
+    # media_ids: cruds.media.fetch_available_media_ids 등으로 미리 걸러낸 판매 가능 매체 id (None 이면 전체)
+    if media_ids is not None and len(media_ids) == 0:
+        raise ValueError("조건에 맞는 판매 가능 매체가 없습니다.")
+
+def media_matcher_agent(brand_name, recent_issue, core_product_summary, manager_name, persist_directory="./chroma_media",
+                        media_ids=None):
+    _check_media_ids(media_ids)
+
+    # 프로세스 공유 LLM 클라이언트
+    llm = get_llm()
+    
+    # 벡터스토어 로드
+    chroma_collection = load_vectorstore(persist_directory)
+    
+    # 유사도 검색 수행 (판매 가능 매체로 후보를 제한한 뒤 상위 1개만 사용)
+    results = chroma_collection.similarity_search_with_score(
+        build_query_text(recent_issue, core_product_summary), k=1, filter=media_id_filter(media_ids)
+    )
+    top_match = extract_top_match(results)
+
+    return generate_match_result(llm, brand_name, recent_issue, core_product_summary, manager_name, top_match)
+
+def search_top_matches(brands, persist_directory="./chroma_media", media_ids=None):
+    # 브랜드별 쿼리를 한 번에 임베딩/검색해서 브랜드별 top_match 목록 반환 (CPU 작업)
+    chroma_collection = load_vectorstore(persist_directory)
+    queries = [build_query_text(brand["recent_issue"], brand["core_product_summary"]) for brand in brands]
+    return [extract_top_match(results) for results in batch_similarity_search_with_score(chroma_collection, queries, k=1, filter=media_id_filter(media_ids))]
+
+def match_media_batch(brands, manager_name, persist_directory="./chroma_media", max_workers=MATCH_MAX_WORKERS,
+                      media_ids=None):
+    # 여러 브랜드를 한 번에 매칭
+    # brands: [{"brand_name", "recent_issue", "core_product_summary"}, ...]
+    # 쿼리 임베딩/검색은 배치 한 번, 브랜드별 스크립트/이메일 생성 요청은 한 스레드 풀에서 동시에 실행하고 입력 순서대로 반환
+    brands = list(brands)
+    if not brands:
+        return []
+    _check_media_ids(media_ids)
+
+    llm = get_llm()
+    top_matches = search_top_matches(brands, persist_directory, media_ids)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, 2 * len(brands))) as executor:
+        futures = [
+            submit_match_generation(
+                executor, llm, brand["brand_name"], brand["recent_issue"],
+                brand["core_product_summary"], manager_name, top_match
+            )
+            for brand, top_match in zip(brands, top_matches)
+        ]
+        return [
+            build_match_result(top_match, script.result(), email.result())
+            for top_match, (script, email) in zip(top_matches, futures)
+        ]
+
+async def amatch_media_batch(brands, manager_name, persist_directory="./chroma_media", max_workers=MATCH_MAX_WORKERS,
+                             media_ids=None):
+    # match_media_batch 의 비동기 버전 (FastAPI 엔드포인트용)
+    # 임베딩/검색은 제한된 검색 스레드 풀에서, LLM 생성은 ainvoke 로 이벤트 루프에서 동시에 (요청 최대 max_workers 개)
+    brands = list(brands)
+    if not brands:
+        return []
+    _check_media_ids(media_ids)
+
+    llm = get_llm()
+    top_matches = await run_search(search_top_matches, brands, persist_directory, media_ids)
+
+    semaphore = asyncio.Semaphore(max_workers)
+    return list(await asyncio.gather(*(
+        agenerate_match_result(
+            llm, brand["brand_name"], brand["recent_issue"], brand["core_product_summary"], manager_name, top_match, semaphore
+        )
+        for brand, top_match in zip(brands, top_matches)
+    )))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Text, Date, Float
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Text, Date, Float, Index, text
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from datetime import datetime
@@ -10,8 +10,12 @@ Base = declarative_base(cls=AsyncAttrs)
 
 class Brand(Base):
     __tablename__ = "brands"
+    __table_args__ = (
+        # 브랜드명 기준 get-or-create (upsert) 를 위한 유니크 인덱스
+        Index("ux_brands_brand_name", "brand_name", unique=True),
+    )
 
-    brand_id = Column(Integer, primary_key=True, index=True)
+    brand_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     subsidiary_id = Column(String(36), default=lambda: str(uuid.uuid4()))
     brand_name = Column(String(255))
     main_phone_number = Column(String(50))
@@ -46,6 +50,12 @@ class Campaign(Base):
 
 class Media(Base):
     __tablename__ = "medias"
+    __table_args__ = (
+        # 판매 가능 매체 조회 (quantity > 0)
+        Index("ix_medias_quantity", "quantity"),
+        # 벡터 인덱스 증분 동기화 (WHERE last_updated_at >= 워터마크)
+        Index("ix_medias_last_updated_at", "last_updated_at"),
+    )
 
     media_id = Column(Integer, primary_key=True, index=True)
     media_name = Column(String(255), nullable=False)
@@ -66,6 +76,8 @@ class Media(Base):
     population_target = Column(String(255))
     media_characteristics = Column(Text)
     case_examples = Column(Text)
+    # 행이 추가/변경될 때 DB가 갱신 (LOAD DATA, 직접 UPDATE 포함)
+    last_updated_at = Column(DateTime, server_default=text("CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"))
 
     campaign_medias = relationship("CampaignMedia", back_populates="media")
     brand_matches = relationship('BrandMediaMatch', back_populates='media')
@@ -73,6 +85,10 @@ class Media(Base):
 
 class CampaignMedia(Base):
     __tablename__ = "campaign_medias"
+    __table_args__ = (
+        # 벡터 인덱스 증분 동기화 (WHERE last_updated_at >= 워터마크)
+        Index("ix_campaign_medias_last_updated_at", "last_updated_at"),
+    )
 
     campaign_media_id = Column(Integer, primary_key=True, index=True)
     campaign_id = Column(Integer, ForeignKey("campaigns.campaign_id"), nullable=False)
@@ -84,12 +100,18 @@ class CampaignMedia(Base):
     executed_price = Column(Float)
     execution_image_url = Column(String(255))
     campaign_media_status = Column(String(50))
+    # 행이 추가/변경될 때 DB가 갱신 (LOAD DATA, 직접 UPDATE 포함)
+    last_updated_at = Column(DateTime, server_default=text("CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"))
 
     campaign = relationship("Campaign", back_populates="campaign_medias", single_parent=True)
     media = relationship("Media", back_populates="campaign_medias")
 
 class SalesLog(Base):
     __tablename__ = "sales_logs"
+    __table_args__ = (
+        # 브랜드별 최신 영업 기록 조회 (WHERE brand_id = ? ORDER BY contact_time DESC)
+        Index("ix_sales_logs_brand_id_contact_time", "brand_id", "contact_time"),
+    )
 
     sales_log_id = Column(Integer, primary_key=True, index=True)
     brand_id = Column(Integer, ForeignKey("brands.brand_id"))
@@ -112,8 +134,12 @@ class SalesLog(Base):
 
 class BrandMediaMatch(Base):
     __tablename__ = 'brand_media_matches'
+    __table_args__ = (
+        # 브랜드-매체 매치 중복 방지 및 (brand_id, media_id) 조회
+        Index("ux_brand_media_matches_brand_id_media_id", "brand_id", "media_id", unique=True),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     brand_id = Column(Integer, ForeignKey('brands.brand_id'))
     media_id = Column(Integer, ForeignKey('medias.media_id')) 
     match_reason = Column(Text, nullable=False)
@@ -129,4 +155,23 @@ class BrandMediaMatch(Base):
     brand = relationship('Brand', back_populates='media_matches')
 
     # 'media'와의 관계
-    media = relationship('Media', back_populates='brand_matches')
\ No newline at end of file
+    media = relationship('Media', back_populates='brand_matches')
+
+
+class LoadManifest(Base):
+    __tablename__ = 'load_manifests'
+
+    # CSV 파일별 마지막 로드 정보 (내용 해시가 같으면 로드 생략)
+    file_path = Column(String(255), primary_key=True)
+    content_hash = Column(CHAR(64), nullable=False)
+    row_count = Column(Integer, nullable=False)
+    loaded_at = Column(DateTime, default=datetime.now, nullable=False)
+
+
+class LoadManifestRow(Base):
+    __tablename__ = 'load_manifest_rows'
+
+    # CSV 행별 해시 (파일이 바뀌었을 때 변경된 행만 반영하기 위해 사용)
+    file_path = Column(String(255), primary_key=True)
+    row_key = Column(String(100), primary_key=True)
+    row_hash = Column(CHAR(32), nullable=False)
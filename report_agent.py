@@ -4,6 +4,9 @@ from langgraph.graph import StateGraph
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 import mysql.connector
+from mysql.connector import pooling
+from contextlib import contextmanager
+import threading
 from langchain_community.vectorstores import Chroma
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
@@ -11,8 +14,10 @@ from docx import Document
 import pandas as pd
 import os
 from docx.shared import Inches
-from transformers import AutoTokenizer, AutoModel
-import torch
+from embedding import get_embedding_function
+from vectorstore_registry import CAMPAIGN_RETRIEVER, DEFAULT_RETRIEVER, get_vectorstore
+from media_index import media_id_filter
+from cruds.media import available_media_query
 import json
 from decimal import Decimal
 import sys
@@ -30,6 +35,7 @@ class ProposalState(TypedDict, total=False):
     proposal_text: Optional[str]
     proposal_file_path: Optional[str]
     media_info: list
+    media_filters: Optional[dict]
 
 AgentState = ProposalState
 
@@ -39,50 +45,86 @@ openai_api_key = os.getenv("OPENAI_API_KEY")
 
 llm = ChatOpenAI(model="gpt-4o", openai_api_key=openai_api_key)
 
-# --- HuggingFace 기반 임베딩 클래스 ---
-class BERTSentenceEmbedding:
-    def __init__(self, model_name="sentence-transformers/all-MiniLM-L6-v2"):
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModel.from_pretrained(model_name)
+embedding_function = get_embedding_function()
 
-    def embed_documents(self, texts):
-        return [self._embed(text) for text in texts]
+# --- ✅ 기존 ChromaDB 불러오기 (레지스트리에서 프로세스당 한 번만 열기) ---
+# 조회할 때마다 get_vectorstore 를 거치므로 인덱스 스냅샷이 교체되면 다음 조회부터 새 버전 사용
+def campaign_vectorstore():
+    # 집행 이력이 계속 쌓이는 코퍼스라 기본은 HNSW 근사 검색 (CAMPAIGN_RETRIEVER=chroma 로 되돌릴 수 있음)
+    return get_vectorstore("./chroma_db2", "campaign_media_chroma_hf", CAMPAIGN_RETRIEVER)
 
-    def embed_query(self, text):
-        return self._embed(text)
+def media_vectorstore():
+    return get_vectorstore("./chroma_media", "media", DEFAULT_RETRIEVER)
 
-    def _embed(self, text):
-        inputs = self.tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-        cls_embedding = outputs.last_hidden_state[:, 0, :]
-        return cls_embedding.squeeze(0).cpu().numpy()
+# 시작 시 한 번 열어서 인덱스/임베딩 설정 불일치를 바로 확인
+campaign_vectorstore()
+media_vectorstore()
 
-embedding_function = BERTSentenceEmbedding()
-
-# --- ✅ 기존 ChromaDB 불러오기 ---
-vectorstore = Chroma(
-    collection_name="campaign_media_chroma_hf",
-    embedding_function=embedding_function,
-    persist_directory="./chroma_db2"
+# --- 매체 추천 후보 ---
+# LLM 프롬프트에 넣을 컬럼 / 조회 컬럼(제안서 이미지용 image_day_url 포함) / 프롬프트에 넣을 최대 매체 수
+MEDIA_PROMPT_COLUMNS = (
+    "media_id", "media_name", "location", "specification", "media_type", "slot_count",
+    "unit_price", "duration_seconds", "population_target", "media_characteristics",
 )
+MEDIA_QUERY_COLUMNS = MEDIA_PROMPT_COLUMNS + ("image_day_url",)
+RECOMMEND_CANDIDATES = int(os.getenv("RECOMMEND_CANDIDATES", "10"))
 
 print("기존 ChromaDB 로드 완료!", file=sys.stderr)
 
+# --- 프로세스 단위 MySQL 커넥션 풀 (쿼리마다 새로 접속하지 않도록) ---
+# report_agent 는 제안서마다 report_agent_wrapper 가 별도 프로세스로 실행하므로 커넥션 재사용은 한 번의 실행 안에서만 됨
+# MySQLConnectionPool.get_connection 은 풀이 비면 기다리지 않고 PoolError 를 내므로
+# REPORT_DB_POOL_TIMEOUT 초까지 REPORT_DB_POOL_RETRY_INTERVAL 간격으로 다시 시도
+REPORT_DB_POOL_TIMEOUT = float(os.getenv("REPORT_DB_POOL_TIMEOUT", "10"))
+REPORT_DB_POOL_RETRY_INTERVAL = float(os.getenv("REPORT_DB_POOL_RETRY_INTERVAL", "0.05"))
+
+_db_pool = None
+_db_pool_lock = threading.Lock()
+
+def get_db_pool():
+    global _db_pool
+    if _db_pool is None:
+        with _db_pool_lock:
+            if _db_pool is None:
+                _db_pool = pooling.MySQLConnectionPool(
+                    pool_name="report_agent",
+                    pool_size=int(os.getenv("REPORT_DB_POOL_SIZE", "5")),
+                    host=os.getenv("DB_HOST"),
+                    user=os.getenv("DB_USER"),
+                    password=os.getenv("DB_PASSWORD"),
+                    database=os.getenv("DB_NAME")
+                )
+    return _db_pool
+
+def get_db_connection(timeout=REPORT_DB_POOL_TIMEOUT):
+    # 풀이 비어 있으면 timeout 초까지 기다렸다가 다시 시도, 그래도 없으면 마지막 PoolError 를 그대로 올림
+    pool = get_db_pool()
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return pool.get_connection()
+        except mysql.connector.errors.PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(REPORT_DB_POOL_RETRY_INTERVAL)
+
+@contextmanager
+def db_cursor():
+    # 풀에서 커넥션을 빌려 dict 커서를 제공하고, 끝나면 커넥션을 풀에 반납
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+    finally:
+        conn.close()
+
 def db_query_tool(query: str):
-    load_dotenv()
-    conn = mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME")
-    )
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute(query)
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return results
+    with db_cursor() as cursor:
+        cursor.execute(query)
+        return cursor.fetchall()
 
 def web_search_tool(query: str) -> str:
     return f"[WEB SEARCH RESULT for: {query}]"
@@ -104,27 +146,17 @@ def vectordb_search_tool(query: str, vectorstore, top_k: int = 3) -> str:
     return "\n\n---\n\n".join(combined_results)
 
 def query_brand_and_sales_logs(brand_name: str):
-    load_dotenv()
-    conn = mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME")
-    )
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("""SELECT * FROM brands WHERE brand_name = %s""", (brand_name,))
-    brand_info = cursor.fetchone()
+    # 브랜드 조회와 최신 영업 기록 조회를 같은 커넥션에서 처리
+    with db_cursor() as cursor:
+        cursor.execute("""SELECT * FROM brands WHERE brand_name = %s""", (brand_name,))
+        brand_info = cursor.fetchone()
 
-    if not brand_info:
-        cursor.close()
-        conn.close()
-        return None, None
+        if not brand_info:
+            return None, None
 
-    brand_id = brand_info["brand_id"]
-    cursor.execute("""SELECT * FROM sales_logs WHERE brand_id = %s ORDER BY contact_time DESC LIMIT 1""", (brand_id,))
-    latest_sales_log = cursor.fetchone()
-    cursor.close()
-    conn.close()
+        brand_id = brand_info["brand_id"]
+        cursor.execute("""SELECT * FROM sales_logs WHERE brand_id = %s ORDER BY contact_time DESC LIMIT 1""", (brand_id,))
+        latest_sales_log = cursor.fetchone()
 
     return brand_info, latest_sales_log
 
@@ -148,17 +180,35 @@ def analyze_brand_and_needs(state: ProposalState):
 
 def retrieve_previous_campaigns(state: ProposalState):
     client_needs = state.get("client_needs") or "옥외 광고 집행 사례"
-    similar_cases = vectordb_search_tool(client_needs, vectorstore)
+    similar_cases = vectordb_search_tool(client_needs, campaign_vectorstore())
     return {**state, "previous_campaigns": similar_cases}
 
+def fetch_available_media(media_filters=None):
+    # 판매 가능 매체만 조회 (quantity > 0 + media_filters: media_type, location, min_price, max_price, start_date, end_date)
+    sql, params = available_media_query(columns=MEDIA_QUERY_COLUMNS, **(media_filters or {}))
+    with db_cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+def rank_media_candidates(client_needs: str, media_rows: list, top_k: int = RECOMMEND_CANDIDATES) -> list:
+    # 판매 가능 매체로 제한한 벡터 검색으로 고객 요구사항과 가까운 순 상위 top_k 개만 남김
+    if not client_needs or len(media_rows) <= top_k:
+        return media_rows[:top_k]
+    rows_by_id = {str(row["media_id"]): row for row in media_rows}
+    results = media_vectorstore().similarity_search_with_score(client_needs, k=top_k, filter=media_id_filter(rows_by_id))
+    ranked = [rows_by_id[doc.metadata["media_id"]] for doc, _ in results if doc.metadata.get("media_id") in rows_by_id]
+    return ranked or media_rows[:top_k]
+
 def recommend_media(state: ProposalState):
     client_needs = state.get("client_needs") or ""
-    db_results = db_query_tool("SELECT * FROM medias WHERE quantity > 0;")
+    db_results = fetch_available_media(state.get("media_filters"))
     if not db_results:
         raise ValueError("사용 가능한 매체 정보가 없습니다.")
-    media_info = db_results
+    media_info = rank_media_candidates(client_needs, db_results)
 
-    media_json = json.dumps(db_results, ensure_ascii=False, default=lambda o: float(o) if isinstance(o, Decimal) else str(o))
+    # 프롬프트에는 추천에 필요한 컬럼만 포함 (이미지 URL 등 제외)
+    prompt_rows = [{name: row[name] for name in MEDIA_PROMPT_COLUMNS} for row in media_info]
+    media_json = json.dumps(prompt_rows, ensure_ascii=False, default=lambda o: float(o) if isinstance(o, Decimal) else str(o))
     prompt = f"""
         당신은 옥외 광고 전문 대행사의 전략 기획자입니다.
         다음 브랜드의 고객 요구사항과 유사 집행 사례를 고려하여 가장 적합한 옥외 광고 매체 3가지를 추천해야 합니다.
@@ -377,10 +427,26 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
     parser.add_argument("--brand", required=True, help="브랜드명 (예: 유니클로코리아)")
+    parser.add_argument("--media-type", help="매체 유형 필터 (예: 옥상형 가로 사이니지)")
+    parser.add_argument("--location", help="위치 필터 (부분 일치, 예: 강남)")
+    parser.add_argument("--min-price", type=float, help="최소 단가")
+    parser.add_argument("--max-price", type=float, help="최대 단가")
+    parser.add_argument("--start-date", help="집행 시작일 (YYYY-MM-DD, 해당 기간 잔여 구좌가 있는 매체만)")
+    parser.add_argument("--end-date", help="집행 종료일 (YYYY-MM-DD)")
     args = parser.parse_args()
 
+    media_filters = {
+        "media_type": args.media_type,
+        "location": args.location,
+        "min_price": args.min_price,
+        "max_price": args.max_price,
+        "start_date": args.start_date,
+        "end_date": args.end_date,
+    }
+
     initial_state = {
-        "brand_name": args.brand
+        "brand_name": args.brand,
+        "media_filters": {key: value for key, value in media_filters.items() if value is not None}
     }
 
     final_state = proposal_graph.invoke(initial_state)
@@ -2,7 +2,7 @@ from AgentState import AgentState
 from langchain_openai import ChatOpenAI
 
 from brand_explorer_agent import brand_explorer_agent
-from media_matcher_agent import media_matcher_agent
+from media_matcher_agent import match_media_batch
 
 
 import pandas as pd
@@ -32,15 +32,18 @@ def run_company_media_agent(category, time_filter, manager_name):
     df['sales_call_script'] = None
     df['proposal_email'] = None
 
-    for i in range(df.shape[0]):
-        brand_name = df.loc[i, 'brand_list']
-        recent_issue = df.loc[i, 'recent_brand_issues']
-        core_product_summary = df.loc[i, 'core_product_summary']
-
-        # match_data = media_matcher_agent(brand_name, recent_issue, core_product_summary)
-
-        match_data = media_matcher_agent(brand_name, recent_issue, core_product_summary, manager_name, persist_directory="./chroma_media")
-        
+    # 브랜드별로 한 번씩 호출하지 않고 한 번에 배치 매칭 (결과는 입력 순서대로)
+    brands = [
+        {
+            "brand_name": df.loc[i, 'brand_list'],
+            "recent_issue": df.loc[i, 'recent_brand_issues'],
+            "core_product_summary": df.loc[i, 'core_product_summary'],
+        }
+        for i in range(df.shape[0])
+    ]
+    match_results = match_media_batch(brands, manager_name, persist_directory="./chroma_media")
+
+    for i, match_data in enumerate(match_results):
         df.loc[i, 'matched_media'] = match_data['media_name']
         df.loc[i, 'media_location'] = match_data['location']
         df.loc[i, 'media_type'] = match_data['media_type']
@@ -0,0 +1,62 @@
+# torch-int8 / onnx 임베딩 백엔드 정합성 테스트
+# - 양자화/ONNX 백엔드를 만든 뒤에도 공유 fp32 모델이 eval 모드이고 torch 결과가 그대로인지
+# - 각 백엔드 임베딩이 fp32 torch 임베딩과 충분히 가까운지
+# 모델은 EMBEDDING_TEST_MODEL (기본 DEFAULT_MODEL_NAME) 에서 로드, 로드할 수 없으면 건너뜀
+import os
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from embedding import DEFAULT_MODEL_NAME, BERTSentenceEmbedding, OnnxBackend, QuantizedTorchBackend, load_model
+
+MODEL_NAME = os.getenv("EMBEDDING_TEST_MODEL", DEFAULT_MODEL_NAME)
+
+TEXTS = [
+    "강남역 대형 디지털 전광판, 20~30대 유동인구가 많음",
+    "올림픽대로 야립광고 / 출퇴근 차량 노출",
+    "신제품 출시 캠페인을 준비 중인 패션 브랜드",
+    "short",
+]
+
+
+@pytest.fixture(scope="module")
+def model():
+    try:
+        return load_model(MODEL_NAME)[1]
+    except OSError as e:
+        pytest.skip(f"임베딩 모델을 로드할 수 없음: {e}")
+
+
+def _embed(backend_name, backend=None):
+    embedding = BERTSentenceEmbedding(MODEL_NAME, backend="torch", cache=None)
+    if backend is not None:
+        embedding.backend = backend
+        embedding.backend_name = backend_name
+    return np.asarray(embedding.embed_documents(TEXTS))
+
+
+def _cosine(a, b):
+    return np.sum(a * b, axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+
+def test_int8_backend_matches_torch_and_keeps_shared_model(model):
+    expected = _embed("torch")
+    quantized = QuantizedTorchBackend(MODEL_NAME, model)
+
+    assert not model.training
+    np.testing.assert_array_equal(_embed("torch"), expected)
+    assert _cosine(_embed("torch-int8", quantized), expected).min() > 0.99
+
+
+def test_onnx_backend_matches_torch_and_keeps_shared_model(model, tmp_path):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    expected = _embed("torch")
+    onnx = OnnxBackend(MODEL_NAME, model, onnx_dir=str(tmp_path))
+
+    assert not model.training
+    np.testing.assert_array_equal(_embed("torch"), expected)
+    np.testing.assert_allclose(_embed("onnx", onnx), expected, atol=1e-4)
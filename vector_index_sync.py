@@ -0,0 +1,228 @@
+# 벡터 인덱스 증분 동기화
+# medias → ./chroma_media (media), campaign_medias → ./chroma_db2 (campaign_media_chroma_hf)
+# 현재 스냅샷 manifest 의 워터마크(마지막으로 반영한 last_updated_at) 이후 바뀐 행만 임베딩해서 upsert,
+# DB에서 사라진 id 는 삭제 (문서 id = 테이블 기본키)
+# 변경은 현재 버전을 복사한 새 스냅샷 버전에 반영한 뒤 CURRENT 를 교체 (index_snapshots.py), 변경이 없으면 버전을 만들지 않음
+# HNSW_COLLECTIONS 에 든 컬렉션은 발행 전에 같은 버전 디렉터리의 HNSW 인덱스(ann_index.py)도 갱신
+# (전체 빌드는 새로 만들고, 증분 동기화는 복사된 이전 버전 인덱스에 바뀐 벡터만 추가/삭제)
+# 실행: python vector_index_sync.py [--full] [--index media campaign_media]
+import asyncio
+import hashlib
+import logging
+import math
+import os
+from datetime import date, datetime, timedelta
+
+from langchain_core.documents import Document
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ann_index import save_hnsw_index, update_hnsw_index
+from embedding import get_embedding_function
+from index_snapshots import (
+    create_version, documents_hash, publish_version, read_manifest, resolve_index_path, version_path, write_manifest,
+)
+from models.db_model import Media, CampaignMedia
+from vectorstore_registry import open_vectorstore
+
+logger = logging.getLogger(__name__)
+
+UPSERT_BATCH_SIZE = 256
+# 워터마크보다 이 시간만큼 앞에서부터 다시 조회 (워터마크 이전 시각으로 갱신됐지만 늦게 커밋된 트랜잭션 대비)
+SYNC_OVERLAP = timedelta(seconds=int(os.getenv("VECTOR_SYNC_OVERLAP_SECONDS", "60")))
+# 발행할 때 HNSW 인덱스를 같이 만들 컬렉션 (쉼표 구분)
+HNSW_COLLECTIONS = [name for name in os.getenv("HNSW_COLLECTIONS", "campaign_media_chroma_hf").split(",") if name]
+
+
+def _metadata_value(value):
+    # Chroma 메타데이터는 str/int/float/bool 만 허용 (None, NaN 은 빈 문자열)
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def media_document(row) -> Document:
+    metadata = {
+        name: _metadata_value(row[name])
+        for name in ("media_name", "location", "media_type", "population_target", "media_characteristics", "case_examples")
+    }
+    metadata["media_id"] = str(row["media_id"])
+    metadata["last_updated_at"] = _metadata_value(row.get("last_updated_at"))
+    return Document(
+        page_content=f"""
+            위치: {row['location']}
+            타겟: {row['population_target']}
+            매체 특징: {row['media_characteristics']}
+            집행 사례: {row['case_examples']}
+            """,
+        metadata=metadata
+    )
+
+
+def campaign_media_document(row) -> Document:
+    text = (
+        f"캠페인 ID: {row['campaign_id']}, "
+        f"매체 ID: {row['media_id']}, "
+        f"시작일: {row['start_date']}, "
+        f"종료일: {row['end_date']}, "
+        f"구좌 수: {row['slot_count']}, "
+        f"집행 가격: {row['executed_price']}, "
+        f"진행 상태: {row['campaign_media_status']}"
+    )
+    return Document(page_content=text, metadata={
+        "campaign_media_id": str(row["campaign_media_id"]),
+        "media_id": str(row["media_id"]),
+        "execution_image_url": _metadata_value(row["execution_image_url"]),
+        "last_updated_at": _metadata_value(row.get("last_updated_at")),
+    })
+
+
+# 인덱스명: (모델, 문서 id 컬럼, persist_directory, collection_name, 행 → Document)
+INDEX_SPECS = {
+    "media": (Media, "media_id", "./chroma_media", "media", media_document),
+    "campaign_media": (CampaignMedia, "campaign_media_id", "./chroma_db2", "campaign_media_chroma_hf", campaign_media_document),
+}
+
+
+def upsert_documents(vectorstore, documents, ids) -> int:
+    # id 가 같은 문서는 덮어씀, 반환값은 문서 수
+    for start in range(0, len(documents), UPSERT_BATCH_SIZE):
+        vectorstore.add_documents(documents[start:start + UPSERT_BATCH_SIZE], ids=ids[start:start + UPSERT_BATCH_SIZE])
+    return len(documents)
+
+
+def _publish(root, version, path, vectorstore, collection_name, source_hash, changes=None, **fields):
+    # (HNSW 인덱스를 저장하고) manifest 를 쓰고 CURRENT 를 새 버전으로 교체
+    # changes: None 이면 전체 빌드, (upsert id 목록, 삭제 id 목록) 이면 이전 버전에서 복사된 HNSW 인덱스에 변경분만 반영
+    if collection_name in HNSW_COLLECTIONS:
+        try:
+            if changes is None:
+                ann = save_hnsw_index(vectorstore, path, collection_name)
+            else:
+                ann = update_hnsw_index(vectorstore, path, collection_name, *changes)
+            fields["hnsw"] = {**ann.params, "size": len(ann), "deleted": ann.deleted_count}
+        except ImportError as e:
+            # faiss/hnswlib 이 없으면 Chroma 만 발행 (hnsw 검색기는 처음 열 때 다시 시도)
+            logger.warning("HNSW 인덱스를 만들지 못했습니다: %s", e)
+    index_metadata = get_embedding_function().index_metadata()
+    write_manifest(path, {
+        "version": version,
+        "collection_name": collection_name,
+        "embedding_model": index_metadata["embedding_model"],
+        "pooling": index_metadata["pooling"],
+        "row_count": vectorstore._collection.count(),
+        "source_hash": source_hash,
+        "created_at": datetime.now().isoformat(),
+        **fields,
+    })
+    publish_version(root, version)
+
+
+def build_snapshot(documents, ids, root: str, collection_name: str, source_hash: str = None, **fields) -> str:
+    # 빈 새 버전에 전체 문서를 넣고 CURRENT 교체, 반환값은 새 버전명
+    version, path = create_version(root)
+    vectorstore = open_vectorstore(path, collection_name, create=True)
+    upsert_documents(vectorstore, documents, ids)
+    _publish(root, version, path, vectorstore, collection_name, source_hash or documents_hash(documents, ids), **fields)
+    return version
+
+
+def _apply_changes(root, collection_name, base_version, base_manifest, changed, db_ids, watermark):
+    # 임베딩 계산과 Chroma 쓰기는 블로킹 작업이라 스레드에서 실행, (upsert 수, 삭제 수, 현재 버전) 반환
+    if base_version is None:
+        version = build_snapshot([document for _, document in changed], [doc_id for doc_id, _ in changed],
+                                 root, collection_name, watermark=watermark)
+        return len(changed), 0, version
+
+    base = open_vectorstore(version_path(root, base_version), collection_name)
+    indexed_ids = set(base._collection.get(include=[])["ids"])
+
+    # 겹쳐 조회한 행 중 인덱스에 같은 last_updated_at 으로 들어가 있는 문서는 다시 임베딩하지 않음
+    candidate_ids = [doc_id for doc_id, _ in changed if doc_id in indexed_ids]
+    if candidate_ids:
+        existing = base._collection.get(ids=candidate_ids, include=["metadatas"])
+        indexed_versions = {doc_id: (metadata or {}).get("last_updated_at")
+                            for doc_id, metadata in zip(existing["ids"], existing["metadatas"])}
+        changed = [
+            (doc_id, document) for doc_id, document in changed
+            if not document.metadata["last_updated_at"] or indexed_versions.get(doc_id) != document.metadata["last_updated_at"]
+        ]
+    stale_ids = sorted(indexed_ids - db_ids)
+    if not changed and not stale_ids:
+        return 0, 0, base_version
+
+    # 현재 버전을 복사한 새 버전에 변경분만 반영 (읽는 쪽은 교체 전까지 기존 버전을 그대로 사용)
+    version, path = create_version(root, copy_from=base_version)
+    vectorstore = open_vectorstore(path, collection_name, create=True)
+    upserted = upsert_documents(vectorstore, [document for _, document in changed], [doc_id for doc_id, _ in changed])
+    if stale_ids:
+        vectorstore.delete(ids=stale_ids)
+
+    # 소스 해시는 이전 해시 + 변경분으로 이어서 계산 (전체 카탈로그를 다시 읽지 않음)
+    digest = hashlib.sha256(base_manifest.get("source_hash", "").encode("utf-8"))
+    digest.update(documents_hash([document for _, document in changed], [doc_id for doc_id, _ in changed]).encode("utf-8"))
+    digest.update(",".join(stale_ids).encode("utf-8"))
+    _publish(root, version, path, vectorstore, collection_name, digest.hexdigest(),
+             changes=([doc_id for doc_id, _ in changed], stale_ids), watermark=watermark, base_version=base_version)
+    return upserted, len(stale_ids), version
+
+
+async def sync_vector_index(db: AsyncSession, name: str, full: bool = False) -> dict:
+    model, id_column, root, collection_name, to_document = INDEX_SPECS[name]
+    base_version, base_path = resolve_index_path(root)
+    # 스냅샷이 아직 없으면(예전 방식 디렉터리 포함) 새 스냅샷으로 전체 빌드
+    if base_version is None or full:
+        base_version, base_manifest, watermark = None, {}, None
+    else:
+        base_manifest = read_manifest(base_path)
+        watermark = base_manifest.get("watermark")
+
+    # 워터마크 근처에서 바뀐 행을 놓치지 않도록 겹쳐서 조회 (같은 id 는 upsert 라 다시 반영해도 무해, 임베딩은 캐시 적중)
+    stmt = select(model.__table__)
+    if watermark:
+        stmt = stmt.where(model.last_updated_at >= datetime.fromisoformat(watermark) - SYNC_OVERLAP)
+    rows = (await db.execute(stmt)).mappings().all()
+
+    # 삭제 감지는 id 만 비교 (임베딩 대상은 바뀐 행뿐)
+    id_result = await db.execute(select(getattr(model, id_column)))
+    db_ids = {str(value) for value in id_result.scalars().all()}
+
+    timestamps = [row["last_updated_at"] for row in rows if row["last_updated_at"] is not None]
+    if timestamps:
+        watermark = max(timestamps).isoformat()
+
+    changed = [(str(row[id_column]), to_document(row)) for row in rows]
+    upserted, deleted, version = await asyncio.to_thread(
+        _apply_changes, root, collection_name, base_version, base_manifest, changed, db_ids, watermark
+    )
+
+    result = {"index": name, "upserted": upserted, "deleted": deleted, "version": version, "watermark": watermark}
+    logger.info("벡터 인덱스 동기화: %s", result)
+    return result
+
+
+async def sync_all_vector_indexes(session_factory, names=None, full: bool = False) -> list:
+    results = []
+    for name in names or INDEX_SPECS:
+        async with session_factory() as db:
+            results.append(await sync_vector_index(db, name, full=full))
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from db import AsyncSessionLocal
+
+    parser = argparse.ArgumentParser(description="DB 변경분을 벡터 인덱스에 반영")
+    parser.add_argument("--full", action="store_true", help="워터마크를 무시하고 전체 행을 다시 반영")
+    parser.add_argument("--index", nargs="+", choices=list(INDEX_SPECS), help="동기화할 인덱스 (기본: 전체)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    for result in asyncio.run(sync_all_vector_indexes(AsyncSessionLocal, args.index, full=args.full)):
+        print(result)
@@ -0,0 +1,115 @@
+# 벡터스토어 레지스트리
+# (persist_directory, collection_name)별로 Chroma 컬렉션을 프로세스당 한 번만 열어서 재사용
+# 인덱스 스냅샷의 CURRENT 포인터가 바뀌면 다음 조회 때 새 버전을 열고, reload_vectorstore() 로 명시적으로 다시 열 수도 있음
+# kind="numpy" 는 같은 컬렉션의 임베딩을 메모리 행렬로 올린 정확 검색 인덱스 (media_index.py)
+# kind="hybrid" 는 Chroma 벡터 검색 + 문자 n-gram BM25 를 RRF 로 합친 검색기 (hybrid_retriever.py)
+# kind="hnsw" 는 버전 디렉터리에 저장된 HNSW 근사 검색 인덱스 (ann_index.py), 없으면 Chroma 임베딩으로 만들어 저장
+import os
+import threading
+
+from langchain_community.vectorstores import Chroma
+
+from embedding import get_embedding_function
+from index_snapshots import resolve_index_path
+
+# 기본 검색기 (chroma, numpy, hybrid, hnsw)
+DEFAULT_RETRIEVER = os.getenv("MEDIA_RETRIEVER", "chroma")
+# 캠페인 집행 사례(campaign_media) 검색기
+CAMPAIGN_RETRIEVER = os.getenv("CAMPAIGN_RETRIEVER", "hnsw")
+
+_vectorstores = {}
+_lock = threading.Lock()
+
+
+def open_vectorstore(persist_directory, collection_name, create=False):
+    # persist_directory 는 실제 Chroma 디렉터리 (스냅샷 버전 디렉터리 등)
+    # 프로세스 공유 임베딩 함수 (모델은 한 번만 로드)
+    embedding_function = get_embedding_function()
+
+    # 저장된 Chroma 벡터스토어 로드 (create=True 면 없을 때 임베딩 설정 메타데이터와 함께 생성)
+    vectorstore = Chroma(
+        collection_name=collection_name,
+        embedding_function=embedding_function,
+        persist_directory=persist_directory,
+        collection_metadata=embedding_function.index_metadata() if create else None
+    )
+
+    # 인덱스를 만든 임베딩 설정(모델/풀링)과 다르면 바로 실패
+    embedding_function.check_index_metadata(vectorstore._collection.metadata, f"{persist_directory}/{collection_name}")
+    return vectorstore
+
+
+def open_numpy_index(persist_directory, collection_name):
+    from media_index import NumpyMediaIndex
+
+    return NumpyMediaIndex.from_vectorstore(open_vectorstore(persist_directory, collection_name))
+
+
+def open_hybrid_retriever(persist_directory, collection_name):
+    from hybrid_retriever import HybridMediaRetriever
+
+    return HybridMediaRetriever(open_vectorstore(persist_directory, collection_name))
+
+
+def open_hnsw_index(persist_directory, collection_name):
+    from ann_index import load_hnsw_index, save_hnsw_index
+
+    # 검색 결과 문서는 같은 디렉터리의 Chroma 컬렉션에서 조회
+    vectorstore = open_vectorstore(persist_directory, collection_name)
+    try:
+        return load_hnsw_index(vectorstore, persist_directory, collection_name)
+    except FileNotFoundError:
+        # 예전에 만든 인덱스: 이번 한 번만 그래프를 만들고 같은 디렉터리에 저장해서 다음 로드부터 재사용
+        return save_hnsw_index(vectorstore, persist_directory, collection_name)
+
+
+OPENERS = {
+    "chroma": open_vectorstore,
+    "numpy": open_numpy_index,
+    "hybrid": open_hybrid_retriever,
+    "hnsw": open_hnsw_index,
+}
+
+
+def _opener(kind):
+    if kind not in OPENERS:
+        raise ValueError(f"지원하지 않는 검색기: {kind} (사용 가능: {', '.join(OPENERS)})")
+    return OPENERS[kind]
+
+
+def get_vectorstore(persist_directory="./chroma_media", collection_name="media", kind="chroma"):
+    # persist_directory 는 인덱스 루트, 스냅샷(index_snapshots)이 있으면 CURRENT 가 가리키는 버전을 연다
+    # CURRENT 가 바뀌면 다음 호출에서 새 버전으로 교체 (재시작 불필요)
+    key = (kind, persist_directory, collection_name)
+    version, path = resolve_index_path(persist_directory)
+    cached = _vectorstores.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    opener = _opener(kind)
+    with _lock:
+        cached = _vectorstores.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        if cached is not None and hasattr(cached[1], "swap_vectorstore"):
+            # hybrid 는 어휘 색인을 버리지 않고 바뀐 문서만 다시 색인
+            vectorstore = cached[1]
+            vectorstore.swap_vectorstore(open_vectorstore(path, collection_name))
+        else:
+            vectorstore = opener(path, collection_name)
+        _vectorstores[key] = (version, vectorstore)
+    return vectorstore
+
+
+def reload_vectorstore(persist_directory="./chroma_media", collection_name="media", kind="chroma"):
+    # 현재 버전으로 새 핸들을 열어 교체 (교체 전까지는 기존 핸들로 계속 검색 가능)
+    version, path = resolve_index_path(persist_directory)
+    vectorstore = _opener(kind)(path, collection_name)
+    with _lock:
+        _vectorstores[(kind, persist_directory, collection_name)] = (version, vectorstore)
+    return vectorstore
+
+
+def clear_vectorstores():
+    with _lock:
+        _vectorstores.clear()